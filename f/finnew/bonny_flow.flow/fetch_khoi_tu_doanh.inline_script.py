@@ -1,22 +1,40 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Module-level session: Windmill workers are long-lived, so the TCP
+# connection (and TLS session, if any) is reused across invocations
+# instead of re-handshaking per run. Transient 5xx from the data API get
+# a short exponential backoff instead of failing the whole flow branch.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Hoisted: this mapping is invariant, no need to rebuild it per call.
+KEY_FORWARD_COMPATIBLE = {"HSX": "VNINDEX", "HNX": "HNXINDEX", "UPCOM": "UPINDEX"}
 
 
 def fetch_khoi_tu_doanh(base_url: str):
-    response = requests.get(f"{base_url}/khoi_tu_doanh", timeout=30)
+    response = _SESSION.get(f"{base_url}/khoi_tu_doanh", timeout=(5, 30))
     response.raise_for_status()
     return response.json()
 
 
 def main(stock_market: str, base_url: str = "http://172.18.0.10:8000"):
-    KEY_FORWARD_COMPATIBLE = {"HSX": "VNINDEX", "HNX": "HNXINDEX", "UPCOM": "UPINDEX"}
-
     try:
         data = fetch_khoi_tu_doanh(base_url)
         print(data)
         if not data or "data" not in data:
             return {"khoi_tu_doanh": 0, "success": False, "error": "No data returned"}
 
-        stock_market = stock_market.upper() if stock_market else "HSX"
+        stock_market = (stock_market or "HSX").upper()
         stock_market = KEY_FORWARD_COMPATIBLE.get(stock_market, stock_market)
 
         if stock_market not in data["data"]:
@@ -1,10 +1,28 @@
 import boto3
+import functools
 import io
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any
 
 
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region, aws_access_key_id, aws_secret_access_key):
+    """Build (or reuse) an S3 client; cached so warm workers keep the
+    parsed service model and the pooled TLS connections between runs."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
+
 def main(
     aws_access_key: str,
     aws_secret_key: str,
@@ -28,12 +46,7 @@ def main(
     Returns:
         A dictionary with the CSV content or an error message.
     """
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-        region_name=region,
-    )
+    s3_client = _get_s3_client(region, aws_access_key, aws_secret_key)
 
     # 1. Determine the target date using the offset (UTC for consistency)
     target_date = datetime.now(timezone.utc) + timedelta(days=date_offset)
@@ -57,7 +70,10 @@ def main(
     # 3. Attempt to download the file
     try:
         response = s3_client.get_object(Bucket=bucket_name, Key=final_object_key)
-        csv_content = response["Body"].read().decode("utf-8")
+        # Decode the StreamingBody incrementally: read().decode() holds the
+        # raw bytes and the decoded text in memory at once, while the
+        # incremental decoder releases each chunk as soon as it is decoded.
+        csv_content = io.TextIOWrapper(response["Body"], encoding="utf-8").read()
 
         return {
             "success": True,
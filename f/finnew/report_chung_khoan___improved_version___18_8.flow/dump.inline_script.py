@@ -2,35 +2,44 @@ import json
 from datetime import datetime
 
 def main(merged_data: dict):
+    merged_data = merged_data or {}
     quality_info = merged_data.get("data_quality", {})
     execution_info = merged_data.get("execution_metadata", {})
-    
+
+    # Bind the lists once; they feed both the report dict and the log lines.
+    issues = quality_info.get("issues") or []
+    warnings = quality_info.get("warnings") or []
+    errors = execution_info.get("errors") or []
+    success_rate = execution_info.get("success_rate", 0)
+
     failure_report = {
         "status": "FAILED",
         "reason": "Data quality check failed",
         "timestamp": datetime.utcnow().isoformat(),
-        "quality_issues": quality_info.get("issues", []),
-        "quality_warnings": quality_info.get("warnings", []),
-        "success_rate": execution_info.get("success_rate", 0),
-        "errors": execution_info.get("errors", [])
+        "quality_issues": issues,
+        "quality_warnings": warnings,
+        "success_rate": success_rate,
+        "errors": errors,
     }
-    
-    print("=" * 50)
-    print("REPORT GENERATION FAILED")
-    print("=" * 50)
-    print(f"Success rate: {failure_report['success_rate']*100:.1f}%")
-    print(f"Quality passed: {quality_info.get('passed', False)}")
-    
-    if failure_report["quality_issues"]:
-        print(f"Issues: {', '.join(failure_report['quality_issues'])}")
-    
-    if failure_report["quality_warnings"]:
-        print(f"Warnings: {', '.join(failure_report['quality_warnings'])}")
-    
-    if failure_report["errors"]:
-        print(f"Errors: {', '.join(failure_report['errors'])}")
-    
-    print("=" * 50)
-    
+
+    separator = "=" * 50
+    lines = [
+        separator,
+        "REPORT GENERATION FAILED",
+        separator,
+        f"Success rate: {success_rate*100:.1f}%",
+        f"Quality passed: {quality_info.get('passed', False)}",
+    ]
+    if issues:
+        lines.append(f"Issues: {', '.join(issues)}")
+    if warnings:
+        lines.append(f"Warnings: {', '.join(warnings)}")
+    if errors:
+        lines.append(f"Errors: {', '.join(errors)}")
+    lines.append(separator)
+
+    # One print call instead of seven; each print acquires the stdout lock.
+    print("\n".join(lines))
+
     # Still return the failure report for downstream processing
     return failure_report
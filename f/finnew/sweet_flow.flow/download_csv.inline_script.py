@@ -1,9 +1,27 @@
 import boto3
 import csv
+import functools
 import io
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region, aws_access_key_id, aws_secret_access_key):
+    """Build (or reuse) an S3 client; cached so warm workers keep the
+    parsed service model and the pooled TLS connections between runs."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
+
 def main(
     aws_access_key: str,
     aws_secret_key: str,
@@ -13,20 +31,16 @@ def main(
 ):
     """Download CSV from S3 and return content"""
 
-    # Initialize S3 client
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-        region_name=region,
-    )
+    s3_client = _get_s3_client(region, aws_access_key, aws_secret_key)
 
     try:
         # Download object from S3
         response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
 
-        # Read the CSV data
-        csv_content = response["Body"].read().decode("utf-8")
+        # Decode the StreamingBody incrementally: read().decode() holds the
+        # raw bytes and the decoded text in memory at once, while the
+        # incremental decoder releases each chunk as soon as it is decoded.
+        csv_content = io.TextIOWrapper(response["Body"], encoding="utf-8").read()
 
         return {
             "success": True,
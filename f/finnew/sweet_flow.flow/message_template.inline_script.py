@@ -2,6 +2,9 @@
 from typing import Dict, Any
 from datetime import datetime
 
+# Status-to-emoji lookup for the web report's market breadth section.
+_BREADTH_EMOJI = {"positive": "🟢", "negative": "🔴"}
+
 
 def main(
     market_data: Dict[str, Any],
@@ -50,11 +53,15 @@ def _create_telegram_report(data, ai_analysis, stock_indices):
         "Mua ròng" if foreign_data.get("tien_direction") == "up" else "Bán ròng"
     )
 
-    report = f"""🔔 [TỔNG KẾT THỊ TRƯỜNG - {trading_date}]
+    # Collect the report fragments and join once at the end; += on a long
+    # string recopies everything accumulated so far at every append.
+    parts = [
+        f"""🔔 [TỔNG KẾT THỊ TRƯỜNG - {trading_date}]
 📊 VN-Index: {vnindex.get("diem", "N/A")} điểm (▲{vnindex.get("thay_doi", "N/A")} | +{vnindex.get("phan_tram", "N/A")}%)
 💰 GTGD: {vnindex.get("gtgd_ty_dong", 0):,.0f} tỷ đồng
 🌍 Khối ngoại: {foreign_status} {foreign_data.get("tien_ty_dong", 0)} tỷ
 """
+    ]
 
     # Thêm thông tin chỉ số thị trường
     if stock_indices.get("success"):
@@ -62,39 +69,38 @@ def _create_telegram_report(data, ai_analysis, stock_indices):
         top_losers = stock_indices.get("top_losing_indices", [])
 
         if top_gainers:
-            report += f"\n\n🔥 Chỉ số tăng mạnh:"
+            parts.append("\n\n🔥 Chỉ số tăng mạnh:")
             string_format = " | ".join(
-                [f"{idx['name']} (+{idx['percentage']:.2f}%)" for idx in top_gainers]
+                f"{idx['name']} (+{idx['percentage']:.2f}%)" for idx in top_gainers
             )
-            report += f"\n✅ " + string_format
+            parts.append("\n✅ " + string_format)
 
         if top_losers:
-            # Lọc chỉ những chỉ số thực sự giảm
-            actual_losers = [idx for idx in top_losers if idx["percentage"] < 0]
-            if actual_losers:
-                temp_str = " | ".join(
-                    [
-                        f"{idx['name']} ({idx['percentage']:.2f}%)"
-                        for idx in actual_losers
-                    ]
-                )
-                report += f"\n❌ " + temp_str
+            # Lọc chỉ những chỉ số thực sự giảm; filter and format fused in
+            # one generator so the list is walked a single time.
+            temp_str = " | ".join(
+                f"{idx['name']} ({idx['percentage']:.2f}%)"
+                for idx in top_losers
+                if idx["percentage"] < 0
+            )
+            if temp_str:
+                parts.append("\n❌ " + temp_str)
 
     # Thêm ngành hot
     hot_sectors = data.get("additional_info", {}).get("hot_sectors", [])
     if hot_sectors:
-        report += f"\n\n📊 Ngành nổi bật:\n{', '.join(hot_sectors)}"
+        parts.append(f"\n\n📊 Ngành nổi bật:\n{', '.join(hot_sectors)}")
 
     # Thêm phân tích AI
     if ai_analysis.get("success"):
-        report += f"\n\n🧠 Nhận định AI:\n{ai_analysis.get('analysis', '')}"
+        parts.append(f"\n\n🧠 Nhận định AI:\n{ai_analysis.get('analysis', '')}")
 
     # Thêm phần đăng ký nhận tin
-    report += f"\n\n📱 Nhận tổng kết mỗi ngày?"
-    report += f"\n📩 Nhắn TTCK để đăng ký tin tự động"
-    report += f"\n\n🎯 Phân tích sâu – Cập nhật liên tục – Định hướng đầu tư chuẩn xác"
+    parts.append("\n\n📱 Nhận tổng kết mỗi ngày?")
+    parts.append("\n📩 Nhắn TTCK để đăng ký tin tự động")
+    parts.append("\n\n🎯 Phân tích sâu – Cập nhật liên tục – Định hướng đầu tư chuẩn xác")
 
-    return report
+    return "".join(parts)
 
 
 def _create_email_report(data, ai_analysis, stock_indices):
@@ -102,7 +108,8 @@ def _create_email_report(data, ai_analysis, stock_indices):
     vnindex = data.get("vnindex_summary", {})
     trading_date = data.get("trading_date", datetime.now().strftime("%d/%m/%Y"))
 
-    report = f"""Subject: Báo cáo thị trường chứng khoán - {trading_date}
+    parts = [
+        f"""Subject: Báo cáo thị trường chứng khoán - {trading_date}
 
 Kính chào Quý khách,
 
@@ -114,42 +121,43 @@ I. TỔNG QUAN THỊ TRƯỜNG
 • Khối ngoại: {data.get("foreign_investors", {}).get("tien_direction", "N/A")} {data.get("foreign_investors", {}).get("tien_ty_dong", 0)} tỷ
 
 II. DIỄN BIẾN CHỈ SỐ THỊ TRƯỜNG"""
+    ]
 
     if stock_indices.get("success"):
         breadth = stock_indices.get("market_breadth", {})
         overall_perf = stock_indices.get("overall_performance", {})
 
-        report += f"\n• Độ rộng thị trường: {breadth.get('description', 'N/A')}"
-        report += (
+        parts.append(f"\n• Độ rộng thị trường: {breadth.get('description', 'N/A')}")
+        parts.append(
             f"\n• Tâm lý thị trường: {overall_perf.get('market_sentiment', 'N/A')}"
         )
 
         top_gainers = stock_indices.get("top_gaining_indices", [])
         if top_gainers:
             temp_str = ", ".join(
-                [f"{idx['name']} (+{idx['percentage']:.2f}%)" for idx in top_gainers]
+                f"{idx['name']} (+{idx['percentage']:.2f}%)" for idx in top_gainers
             )
-            report += f"\n• Chỉ số tăng mạnh: {temp_str}"
+            parts.append(f"\n• Chỉ số tăng mạnh: {temp_str}")
 
-        top_losers = [
-            idx
+        # Filter and format fused in one generator pass.
+        temp_str = ", ".join(
+            f"{idx['name']} ({idx['percentage']:.2f}%)"
             for idx in stock_indices.get("top_losing_indices", [])
             if idx["percentage"] < 0
-        ]
-        if top_losers:
-            temp_str = ", ".join(
-                [f"{idx['name']} ({idx['percentage']:.2f}%)" for idx in top_losers]
-            )
-            report += f"\n• Chỉ số giảm: {temp_str}"
+        )
+        if temp_str:
+            parts.append(f"\n• Chỉ số giảm: {temp_str}")
 
     if ai_analysis.get("success"):
-        report += f"\n\nIII. NHẬN ĐỊNH CHUYÊN GIA\n{ai_analysis.get('analysis', '')}"
+        parts.append(
+            f"\n\nIII. NHẬN ĐỊNH CHUYÊN GIA\n{ai_analysis.get('analysis', '')}"
+        )
 
-    report += f"\n\n📱 Nhận tổng kết mỗi ngày?"
-    report += f"\n📩 Nhắn TTCK để đăng ký tin tự động"
-    report += f"\n\nTrân trọng,\nTeam phân tích thị trường"
+    parts.append("\n\n📱 Nhận tổng kết mỗi ngày?")
+    parts.append("\n📩 Nhắn TTCK để đăng ký tin tự động")
+    parts.append("\n\nTrân trọng,\nTeam phân tích thị trường")
 
-    return report
+    return "".join(parts)
 
 
 def _create_web_report(data, ai_analysis, stock_indices):
@@ -158,18 +166,15 @@ def _create_web_report(data, ai_analysis, stock_indices):
     foreign_data = data.get("foreign_investors", {})
     trading_date = data.get("trading_date", datetime.now().strftime("%d/%m/%Y"))
 
-    # Xác định trend icon
-    vnindex_trend = (
-        "🔺"
-        if vnindex.get("phan_tram", 0) > 0
-        else "🔻"
-        if vnindex.get("phan_tram", 0) < 0
-        else "➖"
-    )
+    # Xác định trend icon: index by the sign of the change so the value is
+    # fetched and compared once instead of twice through chained ternaries.
+    phan_tram = vnindex.get("phan_tram", 0)
+    vnindex_trend = ("🔻", "➖", "🔺")[(phan_tram > 0) - (phan_tram < 0) + 1]
     foreign_trend = "💰" if foreign_data.get("tien_direction") == "up" else "💸"
 
     # Header với styling đẹp
-    report = f"""# 📈 Báo cáo thị trường chứng khoán
+    parts = [
+        f"""# 📈 Báo cáo thị trường chứng khoán
 ## 📅 Ngày {trading_date}
 
 ---
@@ -192,6 +197,7 @@ def _create_web_report(data, ai_analysis, stock_indices):
 ---
 
 ## 🔥 Diễn biến chỉ số thị trường"""
+    ]
 
     if stock_indices.get("success"):
         top_gainers = stock_indices.get("top_gaining_indices", [])
@@ -205,14 +211,9 @@ def _create_web_report(data, ai_analysis, stock_indices):
 
         # Market breadth analysis
         if market_breadth:
-            breadth_emoji = (
-                "🟢"
-                if market_breadth.get("status") == "positive"
-                else "🔴"
-                if market_breadth.get("status") == "negative"
-                else "🟡"
-            )
-            report += f"""
+            breadth_emoji = _BREADTH_EMOJI.get(market_breadth.get("status"), "🟡")
+            parts.append(
+                f"""
 
 ### {breadth_emoji} Độ rộng thị trường
 > **{market_breadth.get("description", "N/A")}**
@@ -223,14 +224,17 @@ def _create_web_report(data, ai_analysis, stock_indices):
 | 🔴 Giảm | `{market_breadth.get("decline_percentage", 0):.1f}%` | {vnindex.get("cp_tang_giam", {}).get("giam", 0)} mã |
 | ⚪ Đứng giá | `{market_breadth.get("unchanged_percentage", 0):.1f}%` | {vnindex.get("cp_tang_giam", {}).get("khong_doi", 0)} mã |
 """
+            )
 
         # Top gainers
         if top_gainers:
-            report += f"""
+            parts.append(
+                f"""
 ### ✅ Chỉ số tăng mạnh nhất
 
 | 🏆 **Chỉ số** | 💹 **Điểm số** | 📈 **Thay đổi** | 💰 **Khối lượng** |
 |-------------|-------------|-------------|-------------|"""
+            )
 
             for idx in top_gainers:
                 volume_text = (
@@ -238,17 +242,21 @@ def _create_web_report(data, ai_analysis, stock_indices):
                     if idx.get("volume_billion")
                     else "N/A"
                 )
-                report += f"""
+                parts.append(
+                    f"""
 | **{idx["name"]}** | `{idx["points"]:.2f}` | `+{idx["percentage"]:.2f}%` | {volume_text} |"""
+                )
 
         # Top losers
         if top_losers:
-            report += f"""
+            parts.append(
+                f"""
 
 ### ❌ Chỉ số giảm mạnh nhất
 
 | 📉 **Chỉ số** | 💹 **Điểm số** | 📈 **Thay đổi** | 💰 **Khối lượng** |
 |-------------|-------------|-------------|-------------|"""
+            )
 
             for idx in top_losers:
                 volume_text = (
@@ -256,13 +264,16 @@ def _create_web_report(data, ai_analysis, stock_indices):
                     if idx.get("volume_billion")
                     else "N/A"
                 )
-                report += f"""
+                parts.append(
+                    f"""
 | **{idx["name"]}** | `{idx["points"]:.2f}` | `{idx["percentage"]:.2f}%` | {volume_text} |"""
+                )
 
     # Hot sectors
     hot_sectors = data.get("additional_info", {}).get("hot_sectors", [])
     if hot_sectors:
-        report += f"""
+        parts.append(
+            """
 
 ---
 
@@ -271,22 +282,26 @@ def _create_web_report(data, ai_analysis, stock_indices):
 > **Các ngành được quan tâm nhất trong phiên**
 
 """
+        )
         for i, sector in enumerate(hot_sectors, 1):
-            report += f"{i}. **{sector}** 🎯\n"
+            parts.append(f"{i}. **{sector}** 🎯\n")
 
     # Focus stocks
     focus_stocks = data.get("additional_info", {}).get("focus_stocks", [])
     if focus_stocks:
-        report += f"""
+        parts.append(
+            f"""
 
 ### 👀 Cổ phiếu được chú ý
 
 `{" | ".join(focus_stocks[:10])}`
 """
+        )
 
     # AI Analysis
     if ai_analysis.get("success") and ai_analysis.get("analysis"):
-        report += f"""
+        parts.append(
+            f"""
 
 ---
 
@@ -296,9 +311,11 @@ def _create_web_report(data, ai_analysis, stock_indices):
 
 {ai_analysis.get("analysis", "")}
 """
+        )
 
     # Subscription section
-    report += f"""
+    parts.append(
+        """
 
 ---
 
@@ -310,9 +327,11 @@ def _create_web_report(data, ai_analysis, stock_indices):
 
 🎯 *Phân tích sâu • Cập nhật liên tục • Định hướng đầu tư chuẩn xác*
 """
+    )
 
     # Footer
-    report += f"""
+    parts.append(
+        f"""
 
 ---
 
@@ -331,5 +350,6 @@ def _create_web_report(data, ai_analysis, stock_indices):
   <em>🔄 Cập nhật liên tục • 📊 Dữ liệu chính xác • 🎯 Phân tích chuyên sâu</em>
 </div>
 """
+    )
 
-    return report
+    return "".join(parts)
@@ -1,22 +1,67 @@
 import re
 from datetime import datetime
+from functools import lru_cache
 
+# Patterns compiled once at import; re's internal cache still pays a dict
+# lookup per call, and these run for every row of every CSV.
+# Deletes arrows and the explicit plus sign in one C-level pass; cheaper
+# than a regex sub on these few-character cells.
+_ARROW_TRANS = str.maketrans("", "", "↑↓+")
 
+# Indexed by (has_up) + 2*(has_down); the fourth slot covers a cell that
+# somehow carries both arrows, where up wins as in the old chained test.
+_DIRECTIONS = ("unchanged", "up", "down", "up")
+_CP_RE = re.compile(r"([↑↔↓])(\d+)")
+_CP_KEYS = {"↑": "tang", "↔": "khong_doi", "↓": "giam"}
+_DATE_RE = re.compile(r"(\d{2}/\d{2}/\d{4})")
+_IMPACT_RE = re.compile(r"\((.*?)\)")
+
+# Deletes quotes in one C-level pass; replace() must search and rebuild.
+_QUOTE_TRANS = str.maketrans("", "", '"')
+
+
+def _parse_list(value):
+    """Split a quoted, comma-separated section value into stripped items."""
+    return [item.strip() for item in value.translate(_QUOTE_TRANS).split(",")]
+
+
+@lru_cache(maxsize=512)
 def parse_change_value(change_str):
-    """Parse change string like '↑ +4.63 ' or '↓ -2.34 '"""
+    """Parse change string like '↑ +4.63 ' or '↓ -2.34 '
+
+    Memoized: the same arrow+number cells recur across the index rows and
+    the foreign/proprietary sections within one report.
+    """
     if not change_str:
         return 0.0, "unchanged"
 
     # Remove arrows and extract number, handle extra spaces
-    clean_str = re.sub(r"[↑↓]", "", change_str).strip()
+    clean_str = change_str.translate(_ARROW_TRANS).strip()
+    # Cheap predicate first: raising and unwinding an exception for every
+    # malformed cell costs far more than this character check.
+    if not clean_str or clean_str[0] not in "-.0123456789":
+        return 0.0, "unchanged"
     try:
-        value = float(clean_str.replace("+", ""))
-        direction = (
-            "up" if "↑" in change_str else "down" if "↓" in change_str else "unchanged"
-        )
-        return value, direction
-    except:
+        value = float(clean_str)
+    except ValueError:
         return 0.0, "unchanged"
+    return value, _DIRECTIONS[("↑" in change_str) + 2 * ("↓" in change_str)]
+
+
+@lru_cache(maxsize=512)
+def _parse_cp_counts(cp_str):
+    """Memoized (tang, khong_doi, giam) counts for one cell."""
+    counts = {"tang": 0, "khong_doi": 0, "giam": 0}
+    # One scan for all three arrow counts instead of three searches that
+    # each restart from the front of the string. First occurrence wins,
+    # matching what the per-symbol searches returned.
+    seen = set()
+    for match in _CP_RE.finditer(cp_str):
+        key = _CP_KEYS[match.group(1)]
+        if key not in seen:
+            seen.add(key)
+            counts[key] = int(match.group(2))
+    return counts["tang"], counts["khong_doi"], counts["giam"]
 
 
 def parse_cp_tang_giam(cp_str):
@@ -24,19 +69,9 @@ def parse_cp_tang_giam(cp_str):
     if not cp_str:
         return {"tang": 0, "khong_doi": 0, "giam": 0}
 
-    try:
-        # Extract numbers using regex
-        tang_match = re.search(r"↑(\d+)", cp_str)
-        khong_doi_match = re.search(r"↔(\d+)", cp_str)
-        giam_match = re.search(r"↓(\d+)", cp_str)
-
-        return {
-            "tang": int(tang_match.group(1)) if tang_match else 0,
-            "khong_doi": int(khong_doi_match.group(1)) if khong_doi_match else 0,
-            "giam": int(giam_match.group(1)) if giam_match else 0,
-        }
-    except:
-        return {"tang": 0, "khong_doi": 0, "giam": 0}
+    # Fresh dict per call so cached results are never shared mutable state.
+    tang, khong_doi, giam = _parse_cp_counts(cp_str)
+    return {"tang": tang, "khong_doi": khong_doi, "giam": giam}
 
 
 def parse_foreign_trading(value):
@@ -62,6 +97,57 @@ def parse_foreign_trading(value):
     return {}
 
 
+def _handle_foreign_investors(value, sections):
+    sections["foreign_investors"] = parse_foreign_trading(value)
+
+
+def _handle_top_net_buying(value, sections):
+    # Parse top buying stocks, remove quotes
+    sections["top_net_buying"] = _parse_list(value)
+
+
+def _handle_top_net_selling(value, sections):
+    # Parse top selling stocks, remove quotes
+    sections["top_net_selling"] = _parse_list(value)
+
+
+def _handle_proprietary_trading(value, sections):
+    value_num, direction = parse_change_value(value.replace("tỷ đồng", "").strip())
+    sections["proprietary_trading"] = {
+        "value_billion_vnd": value_num,
+        "direction": direction,
+    }
+
+
+def _handle_hot_sectors(value, sections):
+    sections["hot_sectors"] = _parse_list(value)
+
+
+def _handle_focus_stocks(value, sections):
+    sections["focus_stocks"] = _parse_list(value)
+
+
+def _handle_impact(key, value, sections):
+    # Parse impact stocks with values
+    impact_match = _IMPACT_RE.search(key)
+    impact_value = float(impact_match.group(1)) if impact_match else 0.0
+    target = "positive_impact" if "Tác động tăng" in key else "negative_impact"
+    sections[target] = {"value": impact_value, "stocks": _parse_list(value)}
+
+
+# Exact section names dispatch through one dict lookup instead of walking
+# an if/elif ladder of string comparisons per line; the impact sections
+# carry the value in the key, so they keep a substring fallback.
+_SECTION_HANDLERS = {
+    "Khối ngoại": _handle_foreign_investors,
+    "Top mua ròng": _handle_top_net_buying,
+    "Top bán ròng": _handle_top_net_selling,
+    "Khối tự doanh": _handle_proprietary_trading,
+    "Nhóm ngành nổi bật": _handle_hot_sectors,
+    "Cổ phiếu tâm điểm": _handle_focus_stocks,
+}
+
+
 def main(download_result: dict):
     """Parse CSV content into structured data"""
 
@@ -70,128 +156,74 @@ def main(download_result: dict):
             return {"success": False, "message": "Invalid CSV download result"}
 
         csv_content = download_result["csv_content"]
-        lines = [line.strip() for line in csv_content.split("\n") if line.strip()]
+        # splitlines avoids a trailing empty element and the walrus keeps
+        # it to one strip per line instead of two.
+        lines = [
+            stripped
+            for line in csv_content.splitlines()
+            if (stripped := line.strip())
+        ]
 
         # Extract date from first line
         date_line = lines[0]
-        date_match = re.search(r"(\d{2}/\d{2}/\d{4})", date_line)
+        date_match = _DATE_RE.search(date_line)
         trading_date = (
             date_match.group(1) if date_match else datetime.now().strftime("%d/%m/%Y")
         )
 
-        # Find header line and data start
-        header_line_idx = -1
-        for i, line in enumerate(lines):
-            if "CHỈ SỐ" in line and "ĐIỂM" in line:
-                header_line_idx = i
-                break
-
-        if header_line_idx == -1:
-            raise ValueError("Could not find header line in CSV")
-
-        # Parse market indices (from header line + 1 until empty line)
+        # Single pass over the lines: find the header, parse the index rows
+        # that follow it, and pick up the colon-delimited sections as they
+        # appear, instead of rescanning the whole file a second time.
         market_indices = {}
-        data_start = header_line_idx + 1
-
-        for i in range(data_start, len(lines)):
-            line = lines[i]
-            if not line or line.startswith("Khối"):
-                break
-
-            if "," in line:
-                parts = [p.strip() for p in line.split(",")]
-                if len(parts) >= 7:  # Updated for new format with 7 columns
-                    index_name = parts[0]
-                    diem = float(parts[1])
-                    thay_doi, huong = parse_change_value(parts[2])
-                    phan_tram, _ = parse_change_value(parts[3])  # Extract percentage
-                    klgd = float(parts[4])
-                    gtgd = float(parts[5])
-                    cp_tang_giam = parse_cp_tang_giam(parts[6])
-
-                    market_indices[index_name] = {
-                        "diem": diem,
-                        "thay_doi": thay_doi,
-                        "phan_tram": phan_tram,
-                        "huong": huong,
-                        "klgd_trieu_cp": klgd,
-                        "gtgd_ty_dong": gtgd,
-                        "cp_tang_giam": cp_tang_giam,
-                    }
-
-        # Parse other sections
         data_sections = {}
+        header_found = False
+        in_indices = False
 
         for line in lines:
+            if in_indices:
+                if line.startswith("Khối"):
+                    # End of the index block; the line itself may still be
+                    # a section ("Khối ngoại: ..."), so fall through.
+                    in_indices = False
+                elif "," in line:
+                    parts = [p.strip() for p in line.split(",")]
+                    if len(parts) >= 7:  # Updated for new format with 7 columns
+                        index_name = parts[0]
+                        diem = float(parts[1])
+                        thay_doi, huong = parse_change_value(parts[2])
+                        phan_tram, _ = parse_change_value(parts[3])
+                        klgd = float(parts[4])
+                        gtgd = float(parts[5])
+                        cp_tang_giam = parse_cp_tang_giam(parts[6])
+
+                        market_indices[index_name] = {
+                            "diem": diem,
+                            "thay_doi": thay_doi,
+                            "phan_tram": phan_tram,
+                            "huong": huong,
+                            "klgd_trieu_cp": klgd,
+                            "gtgd_ty_dong": gtgd,
+                            "cp_tang_giam": cp_tang_giam,
+                        }
+            elif not header_found and "CHỈ SỐ" in line and "ĐIỂM" in line:
+                header_found = True
+                in_indices = True
+                continue
+
             if ":" in line and not line.startswith("CHỈ SỐ"):
                 parts = line.split(":", 1)
                 if len(parts) >= 2:
                     key = parts[0].strip()
                     value = parts[1].strip().strip(",").strip('"')
 
-                    if key == "Khối ngoại":
-                        data_sections["foreign_investors"] = parse_foreign_trading(
-                            value
-                        )
-
-                    elif key == "Top mua ròng":
-                        # Parse top buying stocks, remove quotes
-                        stocks = [
-                            stock.strip() for stock in value.replace('"', "").split(",")
-                        ]
-                        data_sections["top_net_buying"] = stocks
-
-                    elif key == "Top bán ròng":
-                        # Parse top selling stocks, remove quotes
-                        stocks = [
-                            stock.strip() for stock in value.replace('"', "").split(",")
-                        ]
-                        data_sections["top_net_selling"] = stocks
-
-                    elif key == "Khối tự doanh":
-                        # Parse proprietary trading
-                        value_num, direction = parse_change_value(
-                            value.replace("tỷ đồng", "").strip()
-                        )
-                        data_sections["proprietary_trading"] = {
-                            "value_billion_vnd": value_num,
-                            "direction": direction,
-                        }
-
-                    elif key == "Nhóm ngành nổi bật":
-                        # Parse hot sectors, remove quotes
-                        items = [
-                            item.strip() for item in value.replace('"', "").split(",")
-                        ]
-                        data_sections["hot_sectors"] = items
-
-                    elif key == "Cổ phiếu tâm điểm":
-                        # Parse focus stocks, remove quotes
-                        items = [
-                            item.strip() for item in value.replace('"', "").split(",")
-                        ]
-                        data_sections["focus_stocks"] = items
-
+                    handler = _SECTION_HANDLERS.get(key)
+                    if handler is not None:
+                        handler(value, data_sections)
                     elif "Tác động tăng" in key or "Tác động giảm" in key:
-                        # Parse impact stocks with values
-                        impact_match = re.search(r"\((.*?)\)", key)
-                        impact_value = (
-                            float(impact_match.group(1)) if impact_match else 0.0
-                        )
-
-                        stocks = [
-                            stock.strip() for stock in value.replace('"', "").split(",")
-                        ]
-                        if "Tác động tăng" in key:
-                            data_sections["positive_impact"] = {
-                                "value": impact_value,
-                                "stocks": stocks,
-                            }
-                        else:
-                            data_sections["negative_impact"] = {
-                                "value": impact_value,
-                                "stocks": stocks,
-                            }
+                        _handle_impact(key, value, data_sections)
+
+        if not header_found:
+            raise ValueError("Could not find header line in CSV")
 
         # Structure the final data
         structured_data = {
@@ -2,6 +2,8 @@
 from typing import Dict, Any, Optional
 import logging
 
+_REQUIRED_FIELDS = ("diem", "thay_doi", "phan_tram", "gtgd_ty_dong")
+
 
 def main(raw_market_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -21,50 +23,41 @@ def main(raw_market_data: Dict[str, Any]) -> Dict[str, Any]:
             raise ValueError("Invalid market data format")
 
         raw_market_data = raw_market_data.get("data", "")
-        # Chuẩn hóa cấu trúc dữ liệu
-        processed_data = {
-            "success": True,
-            "data": {
-                "trading_date": raw_market_data.get("trading_date"),
-                "vnindex_summary": raw_market_data.get("vnindex_summary", {}),
-                "foreign_investors": raw_market_data.get("additional_info", {}).get(
-                    "foreign_investors", {}
-                ),
-                "analysis": raw_market_data.get("analysis", {}),
-                "additional_info": raw_market_data.get("additional_info", {}),
-                "market_indices": raw_market_data.get("market_indices", {}),
-            },
+        # Chuẩn hóa cấu trúc dữ liệu; the repeated sub-dicts are fetched
+        # into locals once instead of chaining .get per field.
+        vnindex = raw_market_data.get("vnindex_summary", {})
+        additional_info = raw_market_data.get("additional_info", {})
+        trading_date = raw_market_data.get("trading_date")
+
+        data = {
+            "trading_date": trading_date,
+            "vnindex_summary": vnindex,
+            "foreign_investors": additional_info.get("foreign_investors", {}),
+            "analysis": raw_market_data.get("analysis", {}),
+            "additional_info": additional_info,
+            "market_indices": raw_market_data.get("market_indices", {}),
         }
 
         # Validate các trường bắt buộc
-        vnindex = processed_data["data"]["vnindex_summary"]
-        required_fields = ["diem", "thay_doi", "phan_tram", "gtgd_ty_dong"]
-
-        for field in required_fields:
+        for field in _REQUIRED_FIELDS:
             if field not in vnindex:
                 logging.info(f"Warning: Missing field {field} in vnindex_summary")
 
-        # Tính toán metrics cơ bản
-        cp_tang_giam = vnindex.get("cp_tang_giam", {})
-        tang = cp_tang_giam.get("tang", 0)
-        giam = cp_tang_giam.get("giam", 0)
-        khong_doi = cp_tang_giam.get("khong_doi", 0)
-
-        processed_data["data"]["basic_metrics"] = {
+        # Tính toán metrics cơ bản; read GTGD once for both thresholds.
+        gtgd = vnindex.get("gtgd_ty_dong", 0)
+        data["basic_metrics"] = {
             # "total_stocks": tang + giam + khong_doi,
             # "advance_ratio": tang / (tang + giam) if (tang + giam) > 0 else 0,
             "volume_strength": "high"
-            if vnindex.get("gtgd_ty_dong", 0) > 15000
+            if gtgd > 15000
             else "medium"
-            if vnindex.get("gtgd_ty_dong", 0) > 10000
+            if gtgd > 10000
             else "low",
         }
 
-        logging.info(
-            f"Successfully processed market data for {processed_data['data']['trading_date']}"
-        )
+        logging.info(f"Successfully processed market data for {trading_date}")
 
-        return processed_data
+        return {"success": True, "data": data}
 
     except Exception as e:
         logging.error(f"Error processing market data: {str(e)}")
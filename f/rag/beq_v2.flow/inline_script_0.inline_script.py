@@ -6,18 +6,22 @@ Centralizes all configuration management and environment setup
 import os
 import json
 import logging
+import threading
 from dataclasses import dataclass, asdict
 from typing import Dict, Any, Optional
 import wmill
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging once per worker; re-running basicConfig on every job
+# import is a no-op with handlers already attached, so skip it outright.
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class APIConfig:
     """API-based system configuration with validation."""
 
@@ -71,33 +75,42 @@ class APIConfig:
         }
 
 
+# The secret cache lives at module level: SecretManager is re-instantiated
+# on every run, so an instance cache never outlived a single call and each
+# job paid the wmill round-trip plus JSON parse again.
+_SECRET_CACHE: Dict[str, Dict[str, Any]] = {}
+_SECRET_LOCK = threading.Lock()
+_ENV_READY = False
+
+
 class SecretManager:
     """Handles secure credential management with caching."""
 
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-
     def get_secret(self, key: str) -> Dict[str, Any]:
         """Retrieve and cache secret data."""
-        if key not in self._cache:
-            try:
-                secret_data = json.loads(wmill.get_variable(key))
-                self._cache[key] = secret_data
-                logger.info(f"Successfully loaded secret: {key}")
-            except Exception as e:
-                logger.error(f"Failed to load secret {key}: {e}")
-                raise
+        with _SECRET_LOCK:
+            if key not in _SECRET_CACHE:
+                try:
+                    _SECRET_CACHE[key] = json.loads(wmill.get_variable(key))
+                    logger.info("Successfully loaded secret: %s", key)
+                except Exception as e:
+                    logger.error("Failed to load secret %s: %s", key, e)
+                    raise
 
-        return self._cache[key]
+            return _SECRET_CACHE[key]
 
     def setup_environment(self) -> None:
         """Configure environment variables from secrets."""
+        global _ENV_READY
+        if _ENV_READY:
+            return
         try:
             google_secrets = self.get_secret("u/hungnguyen131002/googe_api_key")
             os.environ["GOOGLE_API_KEY"] = google_secrets.get("GOOGLE_API_KEY", "")
+            _ENV_READY = True
             logger.info("Environment setup completed")
         except Exception as e:
-            logger.error(f"Environment setup failed: {e}")
+            logger.error("Environment setup failed: %s", e)
             raise
 
 
@@ -133,11 +146,11 @@ def main(raw_configs: Dict[str, Any]) -> Dict[str, Any]:
         result_config.update(config.derive_service_urls())
 
         logger.info("Configuration validation completed successfully")
-        logger.info(f"RAG API: {config.rag_api_base_url}")
-        logger.info(f"DocMan API: {config.docman_api_base_url}")
+        logger.info("RAG API: %s", config.rag_api_base_url)
+        logger.info("DocMan API: %s", config.docman_api_base_url)
 
         return result_config
 
     except Exception as e:
-        logger.error(f"Configuration validation failed: {e}")
+        logger.error("Configuration validation failed: %s", e)
         raise
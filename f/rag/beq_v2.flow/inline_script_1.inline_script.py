@@ -9,13 +9,31 @@ Uses new API endpoint for searching instead of direct Qdrant client
 """
 
 import logging
+from functools import lru_cache
+
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Optional
 from trism import TritonModel
 
 logger = logging.getLogger(__name__)
 
+# Both caches live at module level because the service object itself is
+# rebuilt on every run; a warm worker then keeps the resolved Triton
+# model and the pooled HTTP connections across jobs.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+
+@lru_cache(maxsize=4)
+def _get_triton_model(model, version, url, grpc):
+    """Build (or reuse) a Triton client; construction re-resolves the
+    channel and model metadata, which dwarfs a single embedding call."""
+    return TritonModel(model=model, version=version, url=url, grpc=grpc)
+
 
 class DefaultSearchService:
     """Search service using new API endpoint"""
@@ -26,25 +44,30 @@ class DefaultSearchService:
             "api_base_url", "http://localhost:8000"
         )  # Add API base URL to config
 
-    def generate_embedding(self, text: str) -> np.ndarray:
-        """Generate embedding for query"""
+    def generate_embedding(self, text: str) -> List[float]:
+        """Generate embedding for query as a flat float list"""
         try:
-            model = TritonModel(
-                model=self.config["query_model"],
-                version=self.config.get("triton_version", 1),
-                url=self.config["triton_url"],
-                grpc=self.config.get("triton_grpc", True),
+            model = _get_triton_model(
+                self.config["query_model"],
+                self.config.get("triton_version", 1),
+                self.config["triton_url"],
+                self.config.get("triton_grpc", True),
             )
 
             model_input = np.array([[text.encode("utf-8")]], dtype=object)
             result = model.run(data=[model_input])
-            output = list(result.values())[0]
-            output = output.reshape(1, -1, 768)[:, 0]
+            output = next(iter(result.values()))
 
-            return np.array(output[0])
+            # The first 768 values are the query embedding. On a contiguous
+            # result the flat slice is a pure view; reshaping a
+            # non-contiguous array would silently copy, so only that rare
+            # case pays for one.
+            if output.flags["C_CONTIGUOUS"]:
+                return output.reshape(-1)[:768].tolist()
+            return output.reshape(-1, 768)[0].tolist()
 
         except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
+            logger.error("Failed to generate embedding: %s", e)
             raise
 
     def search(
@@ -57,16 +80,9 @@ class DefaultSearchService:
     ) -> List[Dict]:
         """Search using new API endpoint"""
         try:
-            # Generate query embedding
+            # Generate query embedding (already a flat list)
             query_embedding = self.generate_embedding(query)
 
-            # Ensure correct format for API
-            if not isinstance(query_embedding, list):
-                query_embedding = query_embedding.tolist()
-
-            if isinstance(query_embedding[0], list):
-                query_embedding = query_embedding[0]
-
             #! TWO APIS: With Session id and not
             api_url = f"{self.api_base_url}/api/v1/chunks/session/search"
 
@@ -86,10 +102,15 @@ class DefaultSearchService:
 
             headers = {"Content-Type": "application/json"}
 
-            logger.info(f"Sending search request to {api_url} with limit {limit}")
+            logger.info("Sending search request to %s with limit %s", api_url, limit)
 
-            # Make API request
-            response = requests.post(api_url, json=payload, headers=headers)
+            # Make API request over the pooled session
+            response = _SESSION.post(
+                api_url,
+                json=payload,
+                headers=headers,
+                timeout=self.config.get("api_timeout", 30),
+            )
 
             if response.status_code == 200:
                 api_response = response.json()
@@ -119,21 +140,23 @@ class DefaultSearchService:
                     formatted_results.append(formatted_result)
 
                 logger.info(
-                    f"Found {len(formatted_results)} results for session {session_id}"
+                    "Found %s results for session %s", len(formatted_results), session_id
                 )
                 return formatted_results
 
             else:
                 logger.error(
-                    f"API request failed with status {response.status_code}: {response.text}"
+                    "API request failed with status %s: %s",
+                    response.status_code,
+                    response.text,
                 )
                 return []
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error during search: {e}")
+            logger.error("Network error during search: %s", e)
             return []
         except Exception as e:
-            logger.error(f"Search failed: {e}")
+            logger.error("Search failed: %s", e)
             return []
 
 
@@ -148,5 +171,5 @@ def main(
         )
         return results
     except Exception as e:
-        logger.error(f"Search service failed: {e}")
+        logger.error("Search service failed: %s", e)
         return []
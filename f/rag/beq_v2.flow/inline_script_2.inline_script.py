@@ -1,6 +1,7 @@
 """Context Service - Optimized Context Processing and Formatting
 Handles intelligent context selection, processing and formatting for optimal LLM consumption with performance optimizations."""
 
+import heapq
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
@@ -8,7 +9,7 @@ from dataclasses import dataclass
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextItem:
     """Structured context item with metadata."""
 
@@ -44,11 +45,13 @@ class ContextProcessor:
                 if context_item and self._validate_context_item(context_item):
                     contexts.append(context_item)
             except Exception as e:
-                logger.warning(f"Failed to process search result: {e}")
+                logger.warning("Failed to process search result: %s", e)
                 continue
 
         logger.info(
-            f"Processed {len(contexts)} valid contexts from {len(search_results)} results"
+            "Processed %s valid contexts from %s results",
+            len(contexts),
+            len(search_results),
         )
         return contexts
 
@@ -74,11 +77,20 @@ class ContextProcessor:
 
         source = payload.get("source", "search")
 
+        # Keep only the fields not already lifted onto the item itself;
+        # storing the whole payload duplicated the text and source into
+        # every context and again into main's output dicts.
+        extras = {
+            k: v
+            for k, v in payload.items()
+            if k not in ("chunk_content", "text", "chunk_text", "source")
+        }
+
         return ContextItem(
             id=context_id,
             score=score,
             text=text.strip(),
-            metadata=payload,
+            metadata=extras,
             source=source,
         )
 
@@ -107,16 +119,14 @@ class ContextProcessor:
         if not contexts:
             return []
 
-        # Sort by score (descending) with stability
-        sorted_contexts = sorted(
-            contexts, key=lambda x: (x.score, len(x.text)), reverse=True
+        # Partial sort: only the top N of the candidates are needed, so an
+        # O(n log k) heap selection beats sorting the full list.
+        selected = heapq.nlargest(
+            self.max_contexts, contexts, key=lambda x: (x.score, len(x.text))
         )
 
-        # Select top N contexts
-        selected = sorted_contexts[: self.max_contexts]
-
         logger.info(
-            f"Selected {len(selected)} contexts from {len(contexts)} candidates"
+            "Selected %s contexts from %s candidates", len(selected), len(contexts)
         )
         return selected
 
@@ -133,20 +143,17 @@ class ContextProcessor:
         if not contexts:
             return ""
 
-        formatted_parts = ["=== REFERENCE INFORMATION ==="]
-
-        for i, context in enumerate(contexts, 1):
-            # Extract document identifier
-            doc_identifier = self._extract_document_identifier(context)
-
-            # Format context entry
-            formatted_parts.extend(
-                [f"\nContext {i} (from {doc_identifier}):", context.text]
-            )
-
-        formatted_parts.append("\n=== END REFERENCE INFORMATION ===")
+        def _iter_parts():
+            yield "=== REFERENCE INFORMATION ==="
+            for i, context in enumerate(contexts, 1):
+                doc_identifier = self._extract_document_identifier(context)
+                yield f"\nContext {i} (from {doc_identifier}):"
+                yield context.text
+            yield "\n=== END REFERENCE INFORMATION ==="
 
-        return "\n".join(formatted_parts)
+        # join consumes the generator directly; no intermediate part list
+        # or per-context two-element extend lists.
+        return "\n".join(_iter_parts())
 
     def _extract_document_identifier(self, context: ContextItem) -> str:
         """Extract meaningful document identifier from context."""
@@ -204,11 +211,11 @@ def main(search_results: List[Dict], upload_mode: bool) -> Tuple[List[Dict], str
             context_dicts.append(context_dict)
 
         logger.info(
-            f"Context processing completed: {len(context_dicts)} contexts prepared"
+            "Context processing completed: %s contexts prepared", len(context_dicts)
         )
 
         return context_dicts, formatted_context
 
     except Exception as e:
-        logger.error(f"Context service failed: {e}")
+        logger.error("Context service failed: %s", e)
         return [], ""
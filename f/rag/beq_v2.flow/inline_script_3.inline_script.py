@@ -1,13 +1,22 @@
 """LLM Service - Optimized Response Generation
 Provides intelligent response generation with advanced prompt management, multilingual support, and comprehensive error handling."""
 
+import functools
 import logging
+import re
+import threading
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
+# Generators cached per configuration so warm workers reuse the OpenAI
+# client (and its pooled HTTP connections) across runs instead of paying
+# a fresh TLS handshake before every completion.
+_GENERATOR_CACHE: Dict[tuple, "ResponseGenerator"] = {}
+_GENERATOR_LOCK = threading.Lock()
+
 
 @dataclass
 class LLMConfiguration:
@@ -66,6 +75,15 @@ class LanguageDetector:
         "trước",
     }
 
+    # Compiled once at class load; each regex is a single C-level scan
+    # with early exit on the first hit, replacing the per-call split +
+    # set intersection. \b lets marker words match next to punctuation,
+    # not only between whitespace.
+    _VI_CHAR_RE = re.compile(f"[{VIETNAMESE_CHARS}]")
+    _VI_WORD_RE = re.compile(
+        r"\b(?:" + "|".join(sorted(VIETNAMESE_WORDS, key=len, reverse=True)) + r")\b"
+    )
+
     @classmethod
     def detect_language(cls, text: str) -> str:
         """
@@ -77,18 +95,20 @@ class LanguageDetector:
         Returns:
             Detected language ('vietnamese' or 'english')
         """
-        text_lower = text.lower()
+        return _detect_language(text.lower())
 
-        # Check for Vietnamese characters
-        if any(char in text_lower for char in cls.VIETNAMESE_CHARS):
-            return "vietnamese"
 
-        # Check for Vietnamese words
-        text_words = set(text_lower.split())
-        if text_words.intersection(cls.VIETNAMESE_WORDS):
-            return "vietnamese"
+@functools.lru_cache(maxsize=1024)
+def _detect_language(text_lower: str) -> str:
+    """Cached core of LanguageDetector.detect_language; the same question
+    is inspected by the prompt builder and the fallback path, so repeat
+    lookups skip the scans entirely."""
+    if LanguageDetector._VI_CHAR_RE.search(
+        text_lower
+    ) or LanguageDetector._VI_WORD_RE.search(text_lower):
+        return "vietnamese"
 
-        return "english"
+    return "english"
 
 
 class PromptManager:
@@ -103,84 +123,76 @@ Examples: - Vietnamese question → Vietnamese response entirely - English quest
 **Response Guidelines:** - Prioritize factual accuracy over comprehensive coverage - Maintain professional, helpful tone without marketing language - Use clear, straightforward language appropriate for the topic - Only answer based on provided reference materials
 ## REMEMBER: Always match the user's language in your response."""
 
+    # Shared by every request's message list; never mutated.
+    _SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+    _SEP60 = "=" * 60
+    _SEP50 = "=" * 50
+
+    # Prompt segments assembled once at class load; per call the prompt is
+    # two concatenations instead of rebuilding the list of parts. Plain
+    # concatenation (no str.format) so braces in user text stay literal.
+    _VI_HEADER = (
+        "🚨 NGÔN NGỮ BẮT BUỘC: Bạn PHẢI trả lời hoàn toàn bằng tiếng Việt!\n"
+        "🚨 MANDATORY LANGUAGE: You MUST respond entirely in Vietnamese!\n\n"
+        + _SEP60
+        + "\n\n"
+    )
+    _EN_HEADER = (
+        "🚨 MANDATORY LANGUAGE: You MUST respond entirely in English!\n\n"
+        + _SEP60
+        + "\n\n"
+    )
+
+    # (prefix, mid, suffix) around context and question.
+    _VI_CTX = (
+        _VI_HEADER + "**Tài liệu tham khảo:**\n",
+        "\n\n" + _SEP50 + "\n\n**Câu hỏi của người dùng:** ",
+        "\n\n**HƯỚNG DẪN QUAN TRỌNG:**\n"
+        "• Trả lời câu hỏi DỰA HOÀN TOÀN trên tài liệu tham khảo phía trên\n"
+        "• Nếu không có thông tin trong tài liệu, hãy nói rõ: 'Thông tin được cung cấp không có chi tiết về [chủ đề]'\n"
+        "• NHỚ: Trả lời hoàn toàn bằng TIẾNG VIỆT, không được dùng tiếng Anh",
+    )
+    _EN_CTX = (
+        _EN_HEADER + "**Reference Materials:**\n",
+        "\n\n" + _SEP50 + "\n\n**User Question:** ",
+        "\n\n**IMPORTANT INSTRUCTIONS:**\n"
+        "• Answer the question based STRICTLY on the reference materials provided above\n"
+        "• If information is not available in sources, state: 'The provided information does not contain details about [topic]'\n"
+        "• REMEMBER: Respond entirely in ENGLISH, do not use Vietnamese",
+    )
+
+    # (prefix, suffix) around the question when no context is available.
+    _VI_NO_CTX = (
+        _VI_HEADER + "**Câu hỏi của người dùng:** ",
+        "\n\n**LƯU Ý:** Không có tài liệu tham khảo. Vui lòng thông báo cho người dùng rằng bạn cần tài liệu tham khảo để đưa ra câu trả lời chính xác. Trả lời bằng TIẾNG VIỆT.",
+    )
+    _EN_NO_CTX = (
+        _EN_HEADER + "**User Question:** ",
+        "\n\n**NOTE:** No reference materials provided. Please inform the user that you need reference materials to provide accurate answers. Respond in ENGLISH.",
+    )
+
     @classmethod
-    def build_user_prompt(cls, question: str, context: str, language: str) -> str:
+    def build_user_prompt(cls, question: str, context: str, detected_lang: str) -> str:
         """
         Build optimized user prompt with enhanced language enforcement.
 
         Args:
             question: User's question
             context: Reference context
-            language: Target language
+            detected_lang: Language detected for the question
 
         Returns:
             Formatted prompt string
         """
-        detected_lang = LanguageDetector.detect_language(question)
+        vietnamese = detected_lang == "vietnamese"
 
-        prompt_parts = []
-
-        # Language enforcement header
-        if detected_lang == "vietnamese":
-            prompt_parts.extend(
-                [
-                    "🚨 NGÔN NGỮ BẮT BUỘC: Bạn PHẢI trả lời hoàn toàn bằng tiếng Việt!",
-                    "🚨 MANDATORY LANGUAGE: You MUST respond entirely in Vietnamese!",
-                ]
-            )
-        else:
-            prompt_parts.append(
-                "🚨 MANDATORY LANGUAGE: You MUST respond entirely in English!"
-            )
-
-        prompt_parts.append("\n" + "=" * 60 + "\n")
-
-        # Add reference materials if available
-        if context.strip():
-            header = (
-                "**Tài liệu tham khảo:**"
-                if detected_lang == "vietnamese"
-                else "**Reference Materials:**"
-            )
-            prompt_parts.extend([header, context, "\n" + "=" * 50 + "\n"])
-
-        # Add user question
-        question_header = (
-            "**Câu hỏi của người dùng:**"
-            if detected_lang == "vietnamese"
-            else "**User Question:**"
-        )
-        prompt_parts.append(f"{question_header} {question}")
-
-        # Add instructions
         if context.strip():
-            if detected_lang == "vietnamese":
-                prompt_parts.extend(
-                    [
-                        "\n**HƯỚNG DẪN QUAN TRỌNG:**",
-                        "• Trả lời câu hỏi DỰA HOÀN TOÀN trên tài liệu tham khảo phía trên",
-                        "• Nếu không có thông tin trong tài liệu, hãy nói rõ: 'Thông tin được cung cấp không có chi tiết về [chủ đề]'",
-                        "• NHỚ: Trả lời hoàn toàn bằng TIẾNG VIỆT, không được dùng tiếng Anh",
-                    ]
-                )
-            else:
-                prompt_parts.extend(
-                    [
-                        "\n**IMPORTANT INSTRUCTIONS:**",
-                        "• Answer the question based STRICTLY on the reference materials provided above",
-                        "• If information is not available in sources, state: 'The provided information does not contain details about [topic]'",
-                        "• REMEMBER: Respond entirely in ENGLISH, do not use Vietnamese",
-                    ]
-                )
-        else:
-            fallback_msg = (
-                "\n**LƯU Ý:** Không có tài liệu tham khảo. Vui lòng thông báo cho người dùng rằng bạn cần tài liệu tham khảo để đưa ra câu trả lời chính xác. Trả lời bằng TIẾNG VIỆT."
-                if detected_lang == "vietnamese"
-                else "\n**NOTE:** No reference materials provided. Please inform the user that you need reference materials to provide accurate answers. Respond in ENGLISH."
-            )
-            prompt_parts.append(fallback_msg)
+            prefix, mid, suffix = cls._VI_CTX if vietnamese else cls._EN_CTX
+            return f"{prefix}{context}{mid}{question}{suffix}"
 
-        return "\n".join(prompt_parts)
+        prefix, suffix = cls._VI_NO_CTX if vietnamese else cls._EN_NO_CTX
+        return f"{prefix}{question}{suffix}"
 
 
 class ResponseGenerator:
@@ -197,6 +209,7 @@ class ResponseGenerator:
         context: str = "",
         language: str = "Vietnamese",
         history: Optional[List[Dict]] = None,
+        stream: bool = False,
     ) -> str:
         """
         Generate optimized response using LLM with comprehensive error handling.
@@ -206,13 +219,20 @@ class ResponseGenerator:
             context: Reference context
             language: Target language
             history: Conversation history
+            stream: Consume the completion incrementally instead of waiting
+                for the full generation
 
         Returns:
             Generated response string
         """
+        if stream:
+            return "".join(
+                self.generate_response_stream(question, context, language, history)
+            )
+
         try:
             # Build message history
-            messages = self._build_messages(question, context, language, history)
+            messages = self._build_messages(question, context, history)
 
             # Generate response
             completion = self.client.chat.completions.create(
@@ -233,16 +253,62 @@ class ResponseGenerator:
             logger.error(f"LLM generation failed: {e}")
             return self._get_fallback_response(question)
 
+    def generate_response_stream(
+        self,
+        question: str,
+        context: str = "",
+        language: str = "Vietnamese",
+        history: Optional[List[Dict]] = None,
+    ):
+        """
+        Yield response tokens as they arrive instead of waiting for the
+        full generation, cutting time-to-first-token for callers that can
+        render incrementally.
+
+        Args:
+            question: User's question
+            context: Reference context
+            language: Target language
+            history: Conversation history
+
+        Yields:
+            Response text fragments
+        """
+        try:
+            messages = self._build_messages(question, context, history)
+
+            completion = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=messages,
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_tokens,
+                top_p=self.config.top_p,
+                stream=True,
+            )
+
+            for chunk in completion:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+            logger.info(f"Successfully streamed response in {language}")
+
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}")
+            yield self._get_fallback_response(question)
+
     def _build_messages(
-        self, question: str, context: str, language: str, history: Optional[List[Dict]]
+        self, question: str, context: str, history: Optional[List[Dict]]
     ) -> List[Dict]:
         """Build optimized message history for LLM."""
-        messages = []
+        # System prompt: one shared dict instead of a fresh copy per call.
+        messages = [PromptManager._SYSTEM_MSG]
 
-        # System prompt
-        messages.append(
-            {"role": "system", "content": self.prompt_manager.SYSTEM_PROMPT}
-        )
+        # Detect once here; the prompt builder receives the result instead
+        # of re-running detection. The caller-supplied `language` is a
+        # loose hint (defaults to "Vietnamese" regardless of the question),
+        # so the question itself stays the source of truth.
+        detected_lang = LanguageDetector.detect_language(question)
 
         # Add conversation history
         if history:
@@ -253,7 +319,9 @@ class ResponseGenerator:
                     )
 
         # User prompt with context
-        user_prompt = self.prompt_manager.build_user_prompt(question, context, language)
+        user_prompt = self.prompt_manager.build_user_prompt(
+            question, context, detected_lang
+        )
         messages.append({"role": "user", "content": user_prompt})
 
         return messages
@@ -269,12 +337,32 @@ class ResponseGenerator:
         )
 
 
+def _get_generator(config: LLMConfiguration) -> "ResponseGenerator":
+    """Return the cached ResponseGenerator for this configuration."""
+    key = (
+        config.base_url,
+        config.api_key,
+        config.model,
+        config.temperature,
+        config.max_tokens,
+        config.top_p,
+    )
+    generator = _GENERATOR_CACHE.get(key)
+    if generator is None:
+        with _GENERATOR_LOCK:
+            generator = _GENERATOR_CACHE.get(key)
+            if generator is None:
+                generator = _GENERATOR_CACHE[key] = ResponseGenerator(config)
+    return generator
+
+
 def main(
     question: str,
     formatted_context: str,
     language: str = "Vietnamese",
     history: Optional[List[Dict]] = None,
     config: Optional[Dict] = None,
+    stream: bool = False,
 ) -> str:
     """
     Main LLM service function with comprehensive optimization.
@@ -285,6 +373,7 @@ def main(
         language: Target language
         history: Conversation history
         config: System configuration
+        stream: Consume the completion incrementally
 
     Returns:
         Generated response string
@@ -299,13 +388,14 @@ def main(
             max_tokens=config.get("max_tokens", 5000) if config else 5000,
         )
 
-        # Generate response
-        generator = ResponseGenerator(llm_config)
+        # Reuse (or build) the generator for this configuration
+        generator = _get_generator(llm_config)
         response = generator.generate_response(
             question=question,
             context=formatted_context,
             language=language,
             history=history,
+            stream=stream,
         )
 
         return response
@@ -6,14 +6,31 @@ from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+_REQUIRED_URLS = (
+    "docman_api_base_url",
+    "context_api_base_url",
+    "chunk_api_base_url",
+)
+
+_CONFIG_DEFAULTS = {
+    "api_timeout": 30,
+    "max_download_retries": 3,
+    "max_chunking_retries": 2,
+    "max_upload_retries": 3,
+    "batch_size_insert": 8,
+}
+
 
 def validate_documents_list(documents: List[str]) -> List[str]:
     """Validate and clean document IDs list."""
     if not documents:
         raise ValueError("No documents provided for processing")
 
-    # Remove duplicates and empty strings
-    clean_docs = list(set(doc.strip() for doc in documents if doc and doc.strip()))
+    # Strip and dedupe in one pass; dict.fromkeys keeps first-seen order,
+    # unlike the set() round-trip it replaces.
+    clean_docs = list(
+        dict.fromkeys(doc.strip() for doc in documents if doc and doc.strip())
+    )
 
     if not clean_docs:
         raise ValueError("No valid document IDs found")
@@ -24,24 +41,13 @@ def validate_documents_list(documents: List[str]) -> List[str]:
 
 def validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     """Validate configuration parameters."""
-    required_urls = [
-        "docman_api_base_url",
-        "context_api_base_url",
-        "chunk_api_base_url",
-    ]
-
-    for url_key in required_urls:
+    for url_key in _REQUIRED_URLS:
         if not config.get(url_key):
             raise ValueError(f"Missing required configuration: {url_key}")
 
-    # Set default values
-    config.setdefault("api_timeout", 30)
-    config.setdefault("max_download_retries", 3)
-    config.setdefault("max_chunking_retries", 2)
-    config.setdefault("max_upload_retries", 3)
-    config.setdefault("batch_size_insert", 8)
-
-    return config
+    # One merge against the module-level defaults instead of five
+    # per-call setdefaults; caller-provided keys win.
+    return {**_CONFIG_DEFAULTS, **config}
 
 
 def main(
@@ -1,16 +1,44 @@
 """Chunk Upload Service - Specialized Vector Database Insertion Module
 Handles optimized batch uploading of document chunks to vector database with intelligent batching, retry logic, and comprehensive error handling."""
 
+import gzip
+import hashlib
+import json
+import random
 import requests
 import logging
+import socket
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Any, Optional
 from dataclasses import dataclass
 from contextlib import contextmanager
+from urllib3.connection import HTTPConnection
 
 logger = logging.getLogger(__name__)
 
 
+class _SocketTuningAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that applies extra options to new sockets.
+
+    urllib3's defaults already include TCP_NODELAY (so small POSTs never
+    stall on Nagle); this keeps those defaults and appends the options
+    passed in, e.g. SO_KEEPALIVE so idle pooled connections survive
+    between batch waves.
+    """
+
+    def __init__(self, socket_options, **kwargs):
+        self._socket_options = (
+            HTTPConnection.default_socket_options + socket_options
+        )
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
 @dataclass
 class UploadResult:
     """Container for upload operation results."""
@@ -24,22 +52,76 @@ class UploadResult:
     errors: List[str] = None
 
 
+@dataclass(slots=True)
+class _BatchOutcome:
+    """Result of one batch upload, returned by each pool worker."""
+
+    ok: bool
+    uploaded: int
+    err: Optional[str] = None
+    terminal: bool = False
+
+
 class UploadError(Exception):
-    """Custom exception for upload errors."""
+    """Custom exception for upload errors.
 
-    pass
+    terminal marks failures that retrying cannot fix (4xx client
+    errors), as opposed to transient network/server trouble.
+    """
 
+    def __init__(self, message: str, terminal: bool = False):
+        super().__init__(message)
+        self.terminal = terminal
 
-@contextmanager
-def upload_session(config: Dict):
-    """Context manager for upload API session."""
+
+def _build_session(config: Dict) -> requests.Session:
+    """Build a session for the upload API.
+
+    The pool is sized for the concurrent batch workers so every worker
+    keeps a persistent connection instead of paying a TCP/TLS handshake
+    once the default 10-connection pool is exhausted. Retries stay with
+    the uploader's own loop, hence max_retries=0 on the adapter.
+    """
     session = requests.Session()
 
+    pool = max(
+        config.get("http_pool_size", 32), config.get("upload_concurrency", 16)
+    )
+
+    socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Opt-in fixed socket buffers for high bandwidth-delay-product links
+    # (buffer ~ bandwidth x RTT). Left unset, the kernel autotunes, which
+    # a fixed SO_SNDBUF/SO_RCVBUF would switch off.
+    if config.get("socket_sndbuf"):
+        socket_options.append(
+            (socket.SOL_SOCKET, socket.SO_SNDBUF, config["socket_sndbuf"])
+        )
+    if config.get("socket_rcvbuf"):
+        socket_options.append(
+            (socket.SOL_SOCKET, socket.SO_RCVBUF, config["socket_rcvbuf"])
+        )
+
+    adapter = _SocketTuningAdapter(
+        socket_options,
+        pool_connections=pool,
+        pool_maxsize=pool,
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
     headers = {"Content-Type": "application/json"}
     if config.get("api_key"):
         headers["Authorization"] = f"Bearer {config['api_key']}"
 
     session.headers.update(headers)
+    return session
+
+
+@contextmanager
+def upload_session(config: Dict):
+    """Context manager for a one-shot upload API session."""
+    session = _build_session(config)
 
     try:
         yield session
@@ -47,6 +129,29 @@ def upload_session(config: Dict):
         session.close()
 
 
+def _pack_batches(chunks_data: List[Dict], target_bytes: int, max_count: int):
+    """Greedily pack chunks into batches by serialized payload size.
+
+    Count-based slicing yields undersized requests for small chunks and
+    oversized ones for large chunks; packing to a byte budget keeps each
+    POST near the target regardless of chunk size.
+    """
+    batch = []
+    batch_bytes = 0
+
+    for chunk in chunks_data:
+        size = len(json.dumps(chunk))
+        if batch and (batch_bytes + size > target_bytes or len(batch) >= max_count):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(chunk)
+        batch_bytes += size
+
+    if batch:
+        yield batch
+
+
 class BatchUploader:
     """Optimized batch upload service with intelligent retry logic."""
 
@@ -59,46 +164,121 @@ class BatchUploader:
         self.tenant = tenant
         self.max_retries = config.get("max_upload_retries", 3)
         self.retry_delay = config.get("retry_delay_seconds", 1)
+        self.retry_delay_cap = config.get("retry_delay_cap", 30)
+        self.concurrency = config.get("upload_concurrency", 16)
+        # Opt-in byte-budget batching; when unset, count-based slicing
+        # with the caller's batch_size is kept.
+        self.target_batch_bytes = config.get("target_batch_bytes")
+        self.max_batch_chunks = config.get("max_batch_chunks", 64)
+        # Opt-in: gzip the JSON body. Chunk payloads are text-heavy and
+        # compress several-fold; requires the chunk API to accept
+        # Content-Encoding: gzip, hence off by default.
+        self.compress_payloads = config.get("compress_payloads", False)
+        # Evaluated once here instead of branching on self.tenant in the
+        # per-batch hot path.
+        self._tenant_field = {"collection_name": tenant} if tenant else {}
+        self.max_terminal_failures = config.get("max_terminal_failures", 3)
+
+    def iter_batch_outcomes(
+        self, session_id: str, chunks_data: List[Dict], batch_size: int = 8
+    ):
+        """Upload chunks concurrently, yielding (batch_number, outcome)
+        pairs as each batch finishes.
+
+        Streaming the outcomes lets callers act on the first completed
+        batch instead of waiting for the slowest one; upload_chunks_batch
+        is the all-at-once reduction over this generator.
+        """
+        total_chunks = len(chunks_data)
+
+        url = f"{self.base_url}/api/v1/chunks/session/{session_id}/chunks"
+
+        logger.info(
+            "Starting batch upload: %d chunks in batches of %d",
+            total_chunks,
+            batch_size,
+        )
+
+        # Each batch is an independent POST, so the batches go out
+        # concurrently; total wall time drops from the sum of round trips
+        # to roughly the slowest ceil(N / concurrency) waves.
+        if self.target_batch_bytes:
+            batches = list(
+                enumerate(
+                    _pack_batches(
+                        chunks_data, self.target_batch_bytes, self.max_batch_chunks
+                    ),
+                    1,
+                )
+            )
+        else:
+            batches = [
+                (batch_number, chunks_data[i : i + batch_size])
+                for batch_number, i in enumerate(range(0, total_chunks, batch_size), 1)
+            ]
+        max_workers = min(self.concurrency, len(batches)) or 1
+
+        # Terminal failures (bad key, bad request) will not heal with
+        # retries; after a few of them the remaining batches are skipped
+        # instead of hammering a broken endpoint.
+        abort = threading.Event()
+        terminal_lock = threading.Lock()
+        terminal_seen = 0
+
+        def run(batch_number: int, batch_chunks: List[Dict]) -> _BatchOutcome:
+            nonlocal terminal_seen
+            if abort.is_set():
+                return _BatchOutcome(
+                    False,
+                    0,
+                    f"Batch {batch_number} skipped: upload aborted after "
+                    f"{self.max_terminal_failures} terminal failures",
+                )
+            outcome = self._run_batch(url, batch_chunks, batch_number, total_chunks)
+            if outcome.terminal:
+                with terminal_lock:
+                    terminal_seen += 1
+                    if terminal_seen >= self.max_terminal_failures:
+                        abort.set()
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # No pacing sleep between submissions: transient overload is
+            # handled by the jittered retry loop, not a blind delay.
+            futures = {
+                executor.submit(run, batch_number, batch_chunks): batch_number
+                for batch_number, batch_chunks in batches
+            }
+
+            # Workers hand back typed outcomes instead of raising through
+            # the future; failures are logged once here so every consumer
+            # of the stream sees the same error trail.
+            for future in as_completed(futures):
+                outcome = future.result()
+                if not outcome.ok:
+                    logger.error(outcome.err)
+                yield futures[future], outcome
 
     def upload_chunks_batch(
         self, session_id: str, chunks_data: List[Dict], batch_size: int = 8
     ) -> UploadResult:
         """Upload chunks in optimized batches with comprehensive error handling."""
-        total_chunks = len(chunks_data)
         successful_batches = 0
         failed_batches = 0
         total_uploaded = 0
         errors = []
 
-        url = f"{self.base_url}/api/v1/chunks/session/{session_id}/chunks"
-
-        logger.info(
-            f"Starting batch upload: {total_chunks} chunks in batches of {batch_size}"
-        )
-
-        for i in range(0, total_chunks, batch_size):
-            batch_number = (i // batch_size) + 1
-            batch_chunks = chunks_data[i : i + batch_size]
-
-            try:
-                uploaded_count = self._upload_single_batch(
-                    url, batch_chunks, batch_number, total_chunks
-                )
-                total_uploaded += uploaded_count
+        for _, outcome in self.iter_batch_outcomes(session_id, chunks_data, batch_size):
+            if outcome.ok:
+                total_uploaded += outcome.uploaded
                 successful_batches += 1
-
-            except Exception as e:
+            else:
                 failed_batches += 1
-                error_msg = f"Batch {batch_number} failed: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
-                continue
-
-            time.sleep(0.01)  # Brief pause between batches
+                errors.append(outcome.err)
 
         result = UploadResult(
             success=failed_batches == 0,
-            total_chunks=total_chunks,
+            total_chunks=len(chunks_data),
             uploaded_chunks=total_uploaded,
             successful_batches=successful_batches,
             failed_batches=failed_batches,
@@ -107,48 +287,120 @@ class BatchUploader:
 
         return result
 
+    def _run_batch(
+        self, url: str, batch_chunks: List[Dict], batch_number: int, total_chunks: int
+    ) -> _BatchOutcome:
+        """Upload one batch and fold any failure into its outcome."""
+        try:
+            return _BatchOutcome(
+                True, self._upload_single_batch(url, batch_chunks, batch_number, total_chunks)
+            )
+        except Exception as e:
+            return _BatchOutcome(
+                False,
+                0,
+                f"Batch {batch_number} failed: {str(e)}",
+                terminal=getattr(e, "terminal", False),
+            )
+
     def _upload_single_batch(
         self, url: str, batch_chunks: List[Dict], batch_number: int, total_chunks: int
     ) -> int:
         """Upload a single batch with retry logic."""
+        payload = {"chunks": batch_chunks, **self._tenant_field}
+
+        # Serialized once per batch, not per attempt. The idempotency key
+        # is deterministic for the payload, so a retry after a lost
+        # response lets the server dedupe instead of double-inserting.
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Idempotency-Key": hashlib.sha256(body).hexdigest()}
+
+        if self.compress_payloads:
+            # Level 3 keeps compression cheap relative to the network
+            # time it saves on text-heavy chunk bodies.
+            body = gzip.compress(body, compresslevel=3)
+            headers["Content-Encoding"] = "gzip"
+
         for attempt in range(self.max_retries):
             try:
-                payload = {"chunks": batch_chunks}
-                if self.tenant:
-                    payload["collection_name"] = self.tenant
-
-                response = self.session.post(url, json=payload, timeout=self.timeout)
+                response = self.session.post(
+                    url, data=body, headers=headers, timeout=self.timeout
+                )
                 response.raise_for_status()
 
                 result = response.json()
                 chunks_processed = result.get("chunks_processed", len(batch_chunks))
 
                 logger.info(
-                    f"Batch {batch_number} successful: {chunks_processed} chunks uploaded"
+                    "Batch %d successful: %d chunks uploaded",
+                    batch_number,
+                    chunks_processed,
                 )
                 return chunks_processed
 
             except requests.RequestException as e:
+                status = getattr(e.response, "status_code", None)
+                if status is not None and 400 <= status < 500 and status not in (408, 429):
+                    # Client errors won't heal on retry; fail the batch
+                    # now instead of burning max_retries * backoff.
+                    raise UploadError(
+                        f"Batch {batch_number} rejected with status {status}: {e}",
+                        terminal=True,
+                    )
+
                 if attempt == self.max_retries - 1:
                     raise UploadError(
                         f"Failed to upload batch {batch_number} after {self.max_retries} attempts: {e}"
                     )
 
                 logger.warning(
-                    f"Upload attempt {attempt + 1} failed for batch {batch_number}: {e}"
+                    "Upload attempt %d failed for batch %d: %s",
+                    attempt + 1,
+                    batch_number,
+                    e,
+                )
+                # Full-jitter exponential backoff: concurrent workers
+                # hitting the same outage spread their retries over the
+                # window instead of hammering the endpoint in lockstep.
+                time.sleep(
+                    random.uniform(
+                        0, min(self.retry_delay_cap, self.retry_delay * 2**attempt)
+                    )
                 )
-                time.sleep(self.retry_delay * (attempt + 1))
 
 
 class ChunkUploadService:
-    """Main chunk upload orchestrator."""
+    """Main chunk upload orchestrator.
+
+    Usable one-shot, or as a context manager for bulk ingestion so the
+    session — and its warmed DNS/TCP/TLS state — is reused across many
+    upload_document_chunks calls instead of rebuilt per document.
+    """
 
     def __init__(self, config: Dict, tenant: Optional[str] = None):
         self.config = config
         self.tenant = tenant
-
-    def upload_document_chunks(self, chunking_data: Dict) -> Dict[str, Any]:
-        """Upload all chunks from chunking results."""
+        self._session: Optional[requests.Session] = None
+
+    def __enter__(self) -> "ChunkUploadService":
+        self._session = _build_session(self.config)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._session.close()
+        self._session = None
+
+    def upload_document_chunks_stream(self, chunking_data: Dict) -> Iterator[Dict]:
+        """Upload all chunks, yielding per-batch progress events followed
+        by the final summary dict.
+
+        Each event carries batch_number, per-batch uploaded count and the
+        running cum_uploaded total, so callers (bulk ingestion scripts,
+        index-readiness checks) can act on the first landed batch instead
+        of blocking on the slowest one. A Windmill step still has to
+        return a whole value, so main() consumes the stream to completion;
+        the early events are for library callers.
+        """
         start_time = time.time()
 
         session_id = chunking_data.get("session_id")
@@ -160,7 +412,7 @@ class ChunkUploadService:
 
         if not chunks_metadata:
             logger.warning("No chunks to upload")
-            return {
+            yield {
                 "success": True,
                 "total_chunks": 0,
                 "uploaded_chunks": 0,
@@ -168,40 +420,80 @@ class ChunkUploadService:
                 "session_id": session_id,
                 "message": "No chunks to upload",
             }
+            return
+
+        logger.info("Uploading %d chunks to session %s", len(chunks_metadata), session_id)
 
-        logger.info(f"Uploading {len(chunks_metadata)} chunks to session {session_id}")
+        successful_batches = 0
+        failed_batches = 0
+        total_uploaded = 0
+        errors = []
 
-        with upload_session(self.config) as session:
+        owns_session = self._session is None
+        session = self._session if self._session is not None else _build_session(self.config)
+        try:
             uploader = BatchUploader(session, self.config, self.tenant)
-            result = uploader.upload_chunks_batch(
+            for batch_number, outcome in uploader.iter_batch_outcomes(
                 session_id, chunks_metadata, batch_size
-            )
+            ):
+                if outcome.ok:
+                    total_uploaded += outcome.uploaded
+                    successful_batches += 1
+                else:
+                    failed_batches += 1
+                    errors.append(outcome.err)
+
+                event = {
+                    "batch_number": batch_number,
+                    "ok": outcome.ok,
+                    "uploaded": outcome.uploaded,
+                    "cum_uploaded": total_uploaded,
+                }
+                if outcome.err:
+                    event["error"] = outcome.err
+                yield event
+        finally:
+            if owns_session:
+                session.close()
 
         upload_time = time.time() - start_time
-        result.upload_time = upload_time
 
         response = {
-            "success": result.success,
-            "total_chunks": result.total_chunks,
-            "uploaded_chunks": result.uploaded_chunks,
-            "successful_batches": result.successful_batches,
-            "failed_batches": result.failed_batches,
+            "success": failed_batches == 0,
+            "total_chunks": len(chunks_metadata),
+            "uploaded_chunks": total_uploaded,
+            "successful_batches": successful_batches,
+            "failed_batches": failed_batches,
             "upload_time": upload_time,
             "session_id": session_id,
             "tenant_name": self.tenant,
-            "upload_rate_chunks_per_second": result.uploaded_chunks / upload_time
+            "upload_rate_chunks_per_second": total_uploaded / upload_time
             if upload_time > 0
             else 0,
         }
 
-        if result.errors:
-            response["errors"] = result.errors
+        if errors:
+            response["errors"] = errors
 
         logger.info(
-            f"Upload completed: {result.uploaded_chunks}/{result.total_chunks} chunks "
-            f"in {upload_time:.2f}s ({response['upload_rate_chunks_per_second']:.1f} chunks/s)"
+            "Upload completed: %d/%d chunks in %.2fs (%.1f chunks/s)",
+            total_uploaded,
+            len(chunks_metadata),
+            upload_time,
+            response["upload_rate_chunks_per_second"],
         )
 
+        yield response
+
+    def upload_document_chunks(self, chunking_data: Dict) -> Dict[str, Any]:
+        """Upload all chunks from chunking results.
+
+        Drains upload_document_chunks_stream and returns its final
+        summary; progress events are only observable through the stream.
+        """
+        response = None
+        for response in self.upload_document_chunks_stream(chunking_data):
+            pass
         return response
 
 
@@ -234,12 +526,12 @@ def main(chunking_data: Dict) -> Optional[str]:
         result = upload_service.upload_document_chunks(chunking_data)
 
         if result["success"]:
-            logger.info(f"Chunk upload completed successfully for session {session_id}")
+            logger.info("Chunk upload completed successfully for session %s", session_id)
             return session_id
         else:
-            logger.error(f"Chunk upload failed for session {session_id}")
+            logger.error("Chunk upload failed for session %s", session_id)
             return None
 
     except Exception as e:
-        logger.error(f"Chunk upload service failed: {e}")
+        logger.error("Chunk upload service failed: %s", e)
         raise